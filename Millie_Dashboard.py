@@ -6,27 +6,29 @@ show_sidebar()
 
 
 import streamlit as st
-import pandas as pd
 import altair as alt
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from streamlit_autorefresh import st_autorefresh
 
-# Auto-refresh every 60 seconds
-st_autorefresh(interval=60 * 1000, key="data_refresh")
+from modules.telemetry import store
+from modules.telemetry.worker import get_snapshot
+from utils.data_quality import show_data_quality
+from utils.export_panel import show_export_panel
+from utils.kpi_panel import show_kpis
+from utils.live_refresh import rerun_on_change
+from utils.report_panel import show_reports_panel
 
-# Load the data
-@st.cache_data
-def load_data():
-    return pd.read_csv("phycotank_array_dummy_data_filled.csv", parse_dates=["timestamp"])
+# Rerun when new readings are committed (pushed by the file watcher)
+rerun_on_change("telemetry")
 
-df = load_data()
+# Latest precomputed results from the shared aggregation worker
+snapshot = get_snapshot()
 
 # Sidebar branding
-st.sidebar.image("nellie_carbon_capture_chip_logo_white.png", use_container_width=True)
+st.sidebar.image("assets/nellie_carbon_capture_chip_logo_white.png", use_container_width=True)
 st.sidebar.markdown("### Nellie Mwyndy Cross PhycoTank Array")
 
-tank_options = ["Aggregate"] + sorted(df["phycotank_id"].unique())
+tank_options = ["Aggregate"] + snapshot.tanks
 selected_option = st.sidebar.selectbox("Select a phycotank", tank_options)
 
 st.sidebar.markdown("Data ingested from Nellie Mwyndy Cross CDR Installation")
@@ -38,12 +40,19 @@ st.sidebar.markdown(f"© Nellie Technologies Ltd. {datetime.now(ZoneInfo('Europe
 # Main dashboard
 st.title("Phycotank Monitoring Dashboard")
 
-metrics = ["pH", "temperature_C", "flow_rate_lph", "energy_consumption_kWh", "lux", "mag_field_T"]
+metrics = store.METRICS
+
+if not snapshot.alerts.empty:
+    st.warning(f"{len(snapshot.alerts)} reading(s) outside operating limits")
+    with st.expander("Alerts"):
+        st.dataframe(snapshot.alerts, hide_index=True)
+show_data_quality(snapshot.quality)
+show_kpis(snapshot.kpis, None if selected_option == "Aggregate" else selected_option)
 
 if selected_option == "Aggregate":
     st.header("Aggregated Metrics for All Instrumented Tanks")
 
-    agg_df = df.groupby("timestamp").agg({metric: "mean" for metric in metrics}).reset_index()
+    agg_df = snapshot.aggregate
 
     for metric in metrics:
         chart = alt.Chart(agg_df).mark_line().encode(
@@ -64,7 +73,7 @@ if selected_option == "Aggregate":
 else:
     st.header(f"Metrics for {selected_option}")
 
-    filtered_df = df[df["phycotank_id"] == selected_option]
+    filtered_df = snapshot.by_tank[selected_option]
 
     for metric in metrics:
         chart = alt.Chart(filtered_df).mark_line().encode(
@@ -81,3 +90,11 @@ else:
     if st.sidebar.checkbox("Show Raw Data"):
         st.subheader(f"Raw Data for {selected_option}")
         st.dataframe(filtered_df)
+
+show_export_panel(
+    tank_options[1:],
+    snapshot.min_ts,
+    snapshot.max_ts,
+    default_tanks=None if selected_option == "Aggregate" else [selected_option],
+)
+show_reports_panel()
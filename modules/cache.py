@@ -0,0 +1,258 @@
+# modules/cache.py
+"""
+Process-wide cache registry with a global memory budget.
+
+Every in-process cache registers here by name and gets a ManagedCache. Each
+entry is sized when it is stored, and hits, misses, evictions and TTL
+expirations are counted per cache. When the registered total goes over the
+budget, the least recently used entries across all evictable caches are
+dropped until it fits again.
+
+Data that must stay resident (the live telemetry snapshot, lab indexes,
+per-session state) goes in caches registered with `evictable=False`. Those
+entries count against the budget and show up in the stats, but are never
+dropped.
+
+Budget: NELLIE_CACHE_BUDGET_MB (default 512).
+"""
+import copy
+import dataclasses
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUDGET_MB = 512
+
+_MISSING = object()
+
+
+def estimate_size(obj, _seen: set[int] | None = None) -> int:
+    """Approximate deep size in bytes (pandas/numpy aware; shared objects counted once)."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (str, bytes, bytearray, memoryview, int, float, bool, type(None))):
+        return sys.getsizeof(obj)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return size + sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(x, seen) for x in obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return size + sum(estimate_size(getattr(obj, f.name), seen) for f in dataclasses.fields(obj))
+    if hasattr(obj, "__dict__"):
+        return size + estimate_size(vars(obj), seen)
+    return size
+
+
+def process_rss_bytes() -> int:
+    """Current RSS of this process (Linux /proc), or 0 where unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+@dataclasses.dataclass
+class _Entry:
+    value: object
+    size: int
+    created: float
+    last_access: float
+
+
+class ManagedCache:
+    """A named key/value cache whose entries are sized and governed by the registry."""
+
+    def __init__(self, registry: "CacheRegistry", name: str, ttl: float | None, evictable: bool):
+        self.registry = registry
+        self.name = name
+        self.ttl = ttl
+        self.evictable = evictable
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()  # oldest access first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl is not None and now - entry.created > self.ttl
+
+    def _drop(self, key: Hashable) -> _Entry:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        return entry
+
+    def get(self, key: Hashable, default=None):
+        with self.registry.lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and self._expired(entry, now):
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            entry.last_access = now
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key: Hashable, value, size: int | None = None) -> None:
+        """Store `value` (sized with estimate_size unless `size` is given) and enforce the budget."""
+        size = estimate_size(value) if size is None else size
+        with self.registry.lock:
+            if key in self._entries:
+                self._drop(key)
+            now = time.monotonic()
+            self._entries[key] = _Entry(value, size, now, now)
+            self.bytes += size
+            self.registry._enforce()
+
+    def get_or_set(self, key: Hashable, build: Callable[[], object]):
+        """Cached value for `key`, building it (outside the lock) on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = build()
+            self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable, default=None):
+        with self.registry.lock:
+            if key not in self._entries:
+                return default
+            return self._drop(key).value
+
+    def clear(self) -> None:
+        with self.registry.lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def purge_expired(self) -> int:
+        with self.registry.lock:
+            now = time.monotonic()
+            stale = [k for k, e in self._entries.items() if self._expired(e, now)]
+            for key in stale:
+                self._drop(key)
+            self.expirations += len(stale)
+            return len(stale)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "cache": self.name,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "ttl_s": self.ttl,
+            "evictable": self.evictable,
+        }
+
+
+class CacheRegistry:
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.lock = threading.RLock()
+        self._caches: dict[str, ManagedCache] = {}
+
+    def register(self, name: str, ttl: float | None = None, evictable: bool = True) -> ManagedCache:
+        """The cache called `name`, created on first use (registration is idempotent)."""
+        with self.lock:
+            cache = self._caches.get(name)
+            if cache is None:
+                cache = self._caches[name] = ManagedCache(self, name, ttl, evictable)
+            return cache
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(c.bytes for c in self._caches.values())
+
+    def _enforce(self) -> None:
+        """Drop expired, then globally least recently used, evictable entries until under budget."""
+        if self.total_bytes <= self.budget_bytes:
+            return
+        for cache in self._caches.values():
+            cache.purge_expired()
+        while self.total_bytes > self.budget_bytes:
+            candidates = [c for c in self._caches.values() if c.evictable and c._entries]
+            if not candidates:
+                return  # only resident data left; reported as over budget in stats()
+            victim = min(candidates, key=lambda c: next(iter(c._entries.values())).last_access)
+            victim._drop(next(iter(victim._entries)))
+            victim.evictions += 1
+
+    def purge_expired(self) -> int:
+        with self.lock:
+            return sum(c.purge_expired() for c in self._caches.values())
+
+    def clear_evictable(self) -> None:
+        with self.lock:
+            for cache in self._caches.values():
+                if cache.evictable:
+                    cache.clear()
+
+    def stats(self) -> list[dict]:
+        with self.lock:
+            return [c.stats() for c in sorted(self._caches.values(), key=lambda c: -c.bytes)]
+
+
+def _budget_from_env() -> int:
+    return int(float(os.environ.get("NELLIE_CACHE_BUDGET_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024)
+
+
+REGISTRY = CacheRegistry(_budget_from_env())
+
+
+def register(name: str, ttl: float | None = None, evictable: bool = True) -> ManagedCache:
+    return REGISTRY.register(name, ttl=ttl, evictable=evictable)
+
+
+def cached(name: str, ttl: float | None = None, copy_result: bool = False):
+    """
+    Memoise a function in the registry (keyed by its arguments). With
+    `copy_result`, callers get a copy, matching st.cache_data semantics.
+    """
+    def decorator(fn):
+        cache = register(name, ttl=ttl)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            value = cache.get_or_set(key, lambda: fn(*args, **kwargs))
+            if not copy_result:
+                return value
+            return value.copy() if hasattr(value, "copy") else copy.deepcopy(value)
+
+        wrapper.cache = cache
+        wrapper.clear = cache.clear
+        return wrapper
+
+    return decorator
@@ -0,0 +1,93 @@
+# modules/checkpoint.py
+"""
+On-disk checkpoints for computed caches (telemetry rollups, lab index,
+parsed workbooks) so a restart or redeploy starts warm.
+
+Each checkpoint is a small header followed by a pickle (protocol 5). The header
+carries a format version, a per-cache schema number and a fingerprint of the
+source data; a checkpoint is only returned when all three still match.
+"""
+import hashlib
+import os
+import pickle
+import struct
+import tempfile
+
+CHECKPOINT_DIR = os.path.join(".cache", "checkpoints")
+
+_MAGIC = b"NLCK"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")  # magic, format version, schema, fingerprint length
+
+# Head/tail window for content digests of large files
+_DIGEST_WINDOW = 1024 * 1024
+
+
+def content_digest(path: str, full: bool = False) -> str:
+    """
+    Content-based fingerprint that survives redeploys (mtimes do not).
+    With full=False only the size plus the first and last MiB are hashed.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    size = os.path.getsize(path)
+    h.update(str(size).encode())
+    with open(path, "rb") as f:
+        if full or size <= 2 * _DIGEST_WINDOW:
+            for block in iter(lambda: f.read(_DIGEST_WINDOW), b""):
+                h.update(block)
+        else:
+            h.update(f.read(_DIGEST_WINDOW))
+            f.seek(-_DIGEST_WINDOW, os.SEEK_END)
+            h.update(f.read(_DIGEST_WINDOW))
+    return h.hexdigest()
+
+
+def _path(name: str) -> str:
+    return os.path.join(CHECKPOINT_DIR, f"{name}.ckpt")
+
+
+def save_checkpoint(name: str, payload, fingerprint=None, schema: int = 1) -> None:
+    """Atomically write `payload` under `name`."""
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    fp = pickle.dumps(fingerprint, protocol=5)
+    body = pickle.dumps(payload, protocol=5)
+    fd, tmp = tempfile.mkstemp(dir=CHECKPOINT_DIR, prefix=f".{name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, schema, len(fp)))
+            f.write(fp)
+            f.write(body)
+        os.replace(tmp, _path(name))
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_checkpoint(name: str, fingerprint=None, schema: int = 1, check_fingerprint: bool = True):
+    """
+    Return the checkpointed payload, or None if it is missing, unreadable,
+    from another format/schema version, or its fingerprint does not match.
+    """
+    try:
+        with open(_path(name), "rb") as f:
+            magic, version, file_schema, fp_len = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _FORMAT_VERSION or file_schema != schema:
+                return None
+            if check_fingerprint and pickle.loads(f.read(fp_len)) != fingerprint:
+                return None
+            if not check_fingerprint:
+                f.seek(fp_len, os.SEEK_CUR)
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:  # corrupt/truncated/old classes: just rebuild
+        print(f"[checkpoint] ignoring {name}: {e}")
+        return None
+
+
+def delete_checkpoint(name: str) -> None:
+    try:
+        os.remove(_path(name))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,175 @@
+# modules/lab_results/analytes.py
+"""
+Cross-sample analyte table built from every lab workbook.
+
+Each workbook is normalised into long rows:
+    sample_id, reported, category, test, analyte, value, value_text, unit, source_file
+
+Field/Value sheets (Celignis-style summaries) give one row per field; tabular
+sheets with a Sample ID column give one row per sample per numeric column.
+Template-parsed sheets supply typed results and declared units; otherwise
+values are coerced and units are read from the field names.
+Extraction is incremental: only new or changed files are re-read, and the
+per-file rows are checkpointed so cross-sample queries never touch the xlsx.
+"""
+import os
+import re
+import threading
+
+import pandas as pd
+
+from modules import cache
+from modules.lab_results.workbooks import LAB_DIR, WorkbookIndex, load_workbook
+
+COLUMNS = ["sample_id", "reported", "category", "test", "analyte", "value", "value_text", "unit", "source_file"]
+
+_FIELD_COLS = {"field", "parameter", "name"}
+_VALUE_COLS = {"value", "result", "data"}
+_SAMPLE_ID_FIELDS = {"sample id", "sampleid", "sample id:"}
+_REPORTED_FIELDS = {"date reported", "report date", "date of report"}
+# Header blocks (lab name, dates, order number) rather than measurements
+_METADATA_CATEGORIES = {"sample info", "testing header"}
+
+# "Aluminium (mg/kg)" -> unit "mg/kg"; any trailing parenthesised token with a slash
+_UNIT_RE = re.compile(r"\s*\(([^()]*/[^()]*)\)\s*$")
+
+# (entries the table was built from, table)
+_table: tuple[dict | None, pd.DataFrame] = (None, pd.DataFrame(columns=COLUMNS))
+_lock = threading.Lock()
+_resident = cache.register("lab-analytes-table", evictable=False)
+
+
+def _norm(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.strip().str.lower().str.replace(r"[_\s]+", " ", regex=True)
+
+
+def split_unit(field: str) -> tuple[str, str | None]:
+    """'Carbon (C) %' -> ('Carbon (C)', '%'); 'HHV (MJ/kg)' -> ('HHV', 'MJ/kg')."""
+    field = str(field).strip()
+    m = _UNIT_RE.search(field)
+    if m:
+        return field[: m.start()].strip(), m.group(1).strip()
+    if "%" in field:
+        return re.sub(r"\s+", " ", field.replace("%", " ")).strip(), "%"
+    return field, None
+
+
+def _find_col(df: pd.DataFrame, names: set[str]):
+    return next((c for c in df.columns if str(c).strip().lower() in names), None)
+
+
+def _from_field_value(df: pd.DataFrame, field_col, value_col) -> pd.DataFrame:
+    fields = _norm(df[field_col])
+    sample = df.loc[fields.isin(_SAMPLE_ID_FIELDS), value_col]
+    sample_id = str(sample.iloc[0]).strip() if not sample.empty else None
+    reported = df.loc[fields.isin(_REPORTED_FIELDS), value_col]
+    reported = pd.to_datetime(reported.iloc[0], dayfirst=True, errors="coerce") if not reported.empty else pd.NaT
+
+    category_col = _find_col(df, {"test category", "category"})
+    test_col = _find_col(df, {"test name", "test", "method"})
+    names_units = df[field_col].map(split_unit)
+    # Declared by the template where known, else parsed here
+    typed_col = df.attrs.get("typed_value_col")
+    values = df[typed_col] if typed_col in df.columns else pd.to_numeric(df[value_col], errors="coerce")
+    declared = df.attrs.get("units") or {}
+    units = df[field_col].map(declared).fillna(names_units.str[1]) if declared else names_units.str[1]
+
+    out = pd.DataFrame({
+        "sample_id": sample_id,
+        "reported": reported,
+        "category": df[category_col].astype("string") if category_col is not None else pd.NA,
+        "test": df[test_col].astype("string") if test_col is not None else pd.NA,
+        "analyte": names_units.str[0],
+        "value": values,
+        "value_text": df[value_col].astype("string"),
+        "unit": units,
+    })
+    # Header/metadata fields are not analytes
+    keep = ~fields.isin(_SAMPLE_ID_FIELDS | _REPORTED_FIELDS) & df[field_col].notna()
+    if category_col is not None:
+        keep &= ~_norm(df[category_col]).isin(_METADATA_CATEGORIES)
+    return out[keep]
+
+
+def _from_table(df: pd.DataFrame, sample_col, sheet: str) -> pd.DataFrame:
+    numeric = [c for c in df.select_dtypes("number").columns if c != sample_col]
+    if not numeric:
+        return pd.DataFrame(columns=COLUMNS)
+    long = df[[sample_col, *numeric]].melt(id_vars=sample_col, var_name="field", value_name="value")
+    names_units = long["field"].map(split_unit)
+    return pd.DataFrame({
+        "sample_id": long[sample_col].astype(str).str.strip(),
+        "reported": pd.NaT,
+        "category": sheet,
+        "test": pd.NA,
+        "analyte": names_units.str[0],
+        "value": long["value"].astype("float64"),
+        "value_text": long["value"].astype("string"),
+        "unit": names_units.str[1],
+    })
+
+
+def extract_analytes(sheets: dict[str, pd.DataFrame], source_file: str) -> pd.DataFrame:
+    """Normalise one parsed workbook into long analyte rows."""
+    frames = []
+    for sheet, df in sheets.items():
+        if df.attrs.get("layout") == "field_value":
+            # Template-parsed: columns are known, no guessing
+            field_col, value_col = df.attrs["field_col"], df.attrs["value_col"]
+        else:
+            field_col = _find_col(df, _FIELD_COLS)
+            value_col = _find_col(df, _VALUE_COLS)
+        if field_col is not None and value_col is not None:
+            frames.append(_from_field_value(df, field_col, value_col))
+            continue
+        sample_col = _find_col(df, _SAMPLE_ID_FIELDS | {"sample"})
+        if sample_col is not None:
+            frames.append(_from_table(df, sample_col, sheet))
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    out = pd.concat(frames, ignore_index=True)
+    out["source_file"] = source_file
+    return out[COLUMNS]
+
+
+def _extract_file(path: str) -> pd.DataFrame:
+    try:
+        return extract_analytes(load_workbook(path), os.path.basename(path))
+    except Exception as e:  # unreadable workbook: index nothing, retry when it changes
+        print(f"[analytes] skipping {path}: {e}")
+        return pd.DataFrame(columns=COLUMNS)
+
+
+_index = WorkbookIndex("lab-analytes", _extract_file, schema=3)
+
+
+def update(lab_dir: str = LAB_DIR) -> pd.DataFrame:
+    """Bring the table up to date with `lab_dir` and return it (shared: don't mutate)."""
+    global _table
+    entries, _ = _index.update(lab_dir)
+    with _lock:
+        if _table[0] is not entries:
+            frames = [e["value"] for e in entries.values() if not e["value"].empty]
+            _table = (entries, pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS))
+            _resident.set("table", _table[1])
+        return _table[1]
+
+
+def query(
+    table: pd.DataFrame,
+    analytes: list[str] | None = None,
+    tests: list[str] | None = None,
+    sample_ids: list[str] | None = None,
+    numeric_only: bool = False,
+) -> pd.DataFrame:
+    mask = pd.Series(True, index=table.index)
+    if analytes:
+        mask &= table["analyte"].isin(analytes)
+    if tests:
+        mask &= table["test"].isin(tests)
+    if sample_ids:
+        mask &= table["sample_id"].isin(sample_ids)
+    if numeric_only:
+        mask &= table["value"].notna()
+    return table[mask]
@@ -0,0 +1,51 @@
+# modules/lab_results/index.py
+"""
+Index of lab result workbooks for the list page (filename, Sample ID, modified).
+Only new or changed files are opened, and the index is checkpointed so a
+restart does not re-open every workbook.
+"""
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from modules.lab_results.workbooks import LAB_DIR, WorkbookIndex
+
+
+def extract_sample_id_quick(xlsx_path: str) -> str | None:
+    """
+    Light-weight sampler: tries to read first sheet and find a 'Sample ID'
+    in long/tidy sheets with columns like ['Field','Value'] (case/spacing tolerant).
+    Returns None if not found or file unreadable.
+    """
+    try:
+        xls = pd.ExcelFile(xlsx_path)
+        # Try first sheet only for speed
+        df = xls.parse(xls.sheet_names[0], nrows=500)
+        cols_lower = {str(c).lower(): c for c in df.columns}
+        field_col = next((cols_lower[c] for c in cols_lower if c in {"field", "parameter", "name"}), None)
+        value_col = next((cols_lower[c] for c in cols_lower if c in {"value", "result", "data"}), None)
+        if field_col and value_col:
+            fields = df[field_col].astype(str).str.strip().str.lower().str.replace(r"[_\s]+", " ", regex=True)
+            mask = fields.isin(["sample id", "sampleid", "sample id:"])
+            if mask.any():
+                return df.loc[mask, value_col].astype(str).iloc[0].strip() or None
+    except Exception:
+        return None
+    return None
+
+
+_index = WorkbookIndex("lab-index", extract_sample_id_quick)
+
+
+def scan(lab_dir: str = LAB_DIR) -> list[dict]:
+    """Rows for the list page."""
+    entries, _ = _index.update(lab_dir)
+    return [
+        {
+            "Filename": os.path.basename(path),
+            "Sample ID": entry["value"] or "—",
+            "Modified": datetime.fromtimestamp(entry["signature"][0] / 1e9).strftime("%Y-%m-%d %H:%M"),
+        }
+        for path, entry in entries.items()
+    ]
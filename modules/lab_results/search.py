@@ -0,0 +1,283 @@
+# modules/lab_results/search.py
+"""
+Full-text and numeric search across every cell of every lab workbook.
+
+Per workbook (built once per content change via WorkbookIndex and checkpointed):
+  - every non-empty cell of every sheet, read raw so cell references match Excel
+  - an inverted index token -> cell positions
+  - numeric cell values sorted, for range queries with searchsorted
+
+The server-wide index merges the per-file postings and keeps one sorted numeric
+array. When files change only their postings are swapped out, so queries stay
+in the millisecond range regardless of how many workbooks there are.
+"""
+import bisect
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from modules import cache
+from modules.lab_results.workbooks import LAB_DIR, WorkbookIndex
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+_SEARCH_SCHEMA = 1
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def _col_letter(col: int) -> str:
+    letters = ""
+    col += 1
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+@dataclass
+class FileCells:
+    sheets: list[str]
+    sheet: np.ndarray      # int16 sheet index per cell
+    row: np.ndarray        # int32 0-based Excel row
+    col: np.ndarray        # int32 0-based Excel column
+    text: list[str]
+    postings: dict[str, np.ndarray]  # token -> cell indices
+    num_values: np.ndarray  # sorted float64
+    num_cells: np.ndarray   # cell index for each sorted value
+
+
+def build_file_cells(path: str) -> FileCells:
+    """Read every sheet raw (no header inference) and index its cells."""
+    grids = pd.read_excel(path, sheet_name=None, header=None, dtype=object)
+    sheets, sheet_ix, rows, cols, texts, raw = [], [], [], [], [], []
+    for i, (name, grid) in enumerate(grids.items()):
+        sheets.append(str(name))
+        cells = grid.stack()
+        cells = cells[cells.notna() & (cells.astype(str).str.strip() != "")]
+        if cells.empty:
+            continue
+        r, c = cells.index.get_level_values(0), cells.index.get_level_values(1)
+        sheet_ix.append(np.full(len(cells), i, dtype=np.int16))
+        rows.append(np.asarray(r, dtype=np.int32))
+        cols.append(np.asarray(c, dtype=np.int32))
+        texts.extend(cells.astype(str).str.strip().tolist())
+        raw.append(cells)
+
+    if not raw:
+        empty_i = np.empty(0, dtype=np.int32)
+        return FileCells(sheets, np.empty(0, dtype=np.int16), empty_i, empty_i, [], {},
+                         np.empty(0), empty_i)
+
+    values = pd.to_numeric(pd.concat(raw, ignore_index=True).astype(str), errors="coerce").to_numpy(dtype=float)
+    numeric_cells = np.flatnonzero(np.isfinite(values))
+    order = np.argsort(values[numeric_cells], kind="stable")
+
+    postings: dict[str, list[int]] = {}
+    for idx, text in enumerate(texts):
+        for token in set(tokenize(text)):
+            postings.setdefault(token, []).append(idx)
+
+    return FileCells(
+        sheets=sheets,
+        sheet=np.concatenate(sheet_ix),
+        row=np.concatenate(rows),
+        col=np.concatenate(cols),
+        text=texts,
+        postings={t: np.asarray(ix, dtype=np.int32) for t, ix in postings.items()},
+        num_values=values[numeric_cells][order],
+        num_cells=numeric_cells[order].astype(np.int32),
+    )
+
+
+def _build_or_empty(path: str) -> FileCells | None:
+    try:
+        return build_file_cells(path)
+    except Exception as e:  # unreadable workbook: not searchable until it changes
+        print(f"[search] skipping {path}: {e}")
+        return None
+
+
+class SearchIndex:
+    def __init__(self):
+        self._files = WorkbookIndex("lab-search", _build_or_empty, schema=_SEARCH_SCHEMA)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._cells: dict[str, FileCells] = {}
+        self._tokens: dict[str, dict[str, np.ndarray]] = {}
+        self._vocab: list[str] = []
+        self._num_values = np.empty(0)
+        self._num_file = np.empty(0, dtype=np.int32)
+        self._num_cell = np.empty(0, dtype=np.int32)
+        self._num_paths: list[str] = []
+        # Postings arrays are shared with the per-file entries (accounted under "lab-search")
+        self._resident = cache.register("lab-search-index", evictable=False)
+
+    # ---------- Maintenance ----------
+    def update(self, lab_dir: str = LAB_DIR) -> None:
+        entries, _ = self._files.update(lab_dir)
+        with self._lock:
+            if entries is self._entries:
+                return
+            old = self._entries
+            removed = [p for p in old if entries.get(p) is not old[p]]
+            added = [p for p in entries if old.get(p) is not entries[p]]
+
+            for path in removed:
+                cells = self._cells.pop(path, None)
+                if cells is None:
+                    continue
+                for token in cells.postings:
+                    files = self._tokens.get(token)
+                    if files is not None:
+                        files.pop(path, None)
+                        if not files:
+                            del self._tokens[token]
+            for path in added:
+                cells = entries[path]["value"]
+                if cells is None:
+                    continue
+                self._cells[path] = cells
+                for token, ix in cells.postings.items():
+                    self._tokens.setdefault(token, {})[path] = ix
+
+            self._vocab = sorted(self._tokens)
+            self._rebuild_numeric()
+            self._entries = entries
+            self._resident.set("index", (self._vocab, self._num_values, self._num_file, self._num_cell))
+
+    def _rebuild_numeric(self) -> None:
+        # File ids in path order, the order results are listed in
+        paths = sorted(self._cells)
+        if not paths:
+            self._num_values = np.empty(0)
+            self._num_file = self._num_cell = np.empty(0, dtype=np.int32)
+            self._num_paths = []
+            return
+        values = np.concatenate([self._cells[p].num_values for p in paths])
+        files = np.concatenate([np.full(len(self._cells[p].num_values), i, dtype=np.int32)
+                                for i, p in enumerate(paths)])
+        cells = np.concatenate([self._cells[p].num_cells for p in paths])
+        order = np.argsort(values, kind="stable")
+        self._num_values, self._num_file, self._num_cell = values[order], files[order], cells[order]
+        self._num_paths = paths
+
+    # ---------- Queries ----------
+    def _term_cells(self, term: str, prefix: bool) -> dict[str, np.ndarray]:
+        if not prefix:
+            return self._tokens.get(term, {})
+        out: dict[str, list[np.ndarray]] = {}
+        i = bisect.bisect_left(self._vocab, term)
+        while i < len(self._vocab) and self._vocab[i].startswith(term):
+            for path, ix in self._tokens[self._vocab[i]].items():
+                out.setdefault(path, []).append(ix)
+            i += 1
+        return {p: np.unique(np.concatenate(ixs)) for p, ixs in out.items()}
+
+    def _text_cells(self, text: str) -> dict[str, np.ndarray] | None:
+        terms = tokenize(text)
+        if not terms:
+            return None
+        result: dict[str, np.ndarray] | None = None
+        for n, term in enumerate(terms):
+            # The last term matches as a prefix so results show while typing
+            hits = self._term_cells(term, prefix=n == len(terms) - 1)
+            if result is None:
+                result = dict(hits)
+            else:
+                result = {p: np.intersect1d(result[p], hits[p], assume_unique=True)
+                          for p in result.keys() & hits.keys()}
+            result = {p: ix for p, ix in result.items() if len(ix)}
+            if not result:
+                break
+        return result
+
+    def _range_cells(self, low: float | None, high: float | None,
+                     limit: int | None = None) -> dict[str, np.ndarray]:
+        """Numeric cells in [low, high] per file; with `limit`, only the first files covering that many."""
+        lo = 0 if low is None else np.searchsorted(self._num_values, low, side="left")
+        hi = len(self._num_values) if high is None else np.searchsorted(self._num_values, high, side="right")
+        files, cells = self._num_file[lo:hi], self._num_cell[lo:hi]
+        if limit is not None and len(files) > limit:
+            # Files are numbered in listing order: keep the fewest leading files with `limit` hits
+            last = np.searchsorted(np.cumsum(np.bincount(files, minlength=len(self._num_paths))), limit)
+            keep = files <= last
+            files, cells = files[keep], cells[keep]
+        order = np.argsort(files, kind="stable")
+        files, cells = files[order], cells[order]
+        ids, starts = np.unique(files, return_index=True)
+        return {self._num_paths[f]: np.sort(group) for f, group in zip(ids, np.split(cells, starts[1:]))}
+
+    def search(self, text: str = "", low: float | None = None, high: float | None = None,
+               limit: int = 200) -> pd.DataFrame:
+        """
+        Cells matching all words in `text` (last word as prefix) and/or with a
+        numeric value in [low, high]. With both, a hit is a numeric cell in range
+        on the same row as a text match (e.g. 'carbon' with 80..90).
+        """
+        with self._lock:
+            text_hits = self._text_cells(text) if text.strip() else None
+            range_hits = None
+            if low is not None or high is not None:
+                # Alone, only the first `limit` cells are listed; with text, every range hit may match
+                range_hits = self._range_cells(low, high, limit=limit if text_hits is None else None)
+
+            if text_hits is None and range_hits is None:
+                return _empty_results()
+            if range_hits is None:
+                hits = text_hits
+            elif text_hits is None:
+                hits = range_hits
+            else:
+                hits = {}
+                for path in text_hits.keys() & range_hits.keys():
+                    c = self._cells[path]
+                    text_rows = np.unique(c.sheet[text_hits[path]].astype(np.int64) << 32 | c.row[text_hits[path]])
+                    rng = range_hits[path]
+                    rng_rows = c.sheet[rng].astype(np.int64) << 32 | c.row[rng]
+                    keep = rng[np.isin(rng_rows, text_rows)]
+                    if len(keep):
+                        hits[path] = keep
+
+            return self._materialise(hits, limit)
+
+    def _materialise(self, hits: dict[str, np.ndarray], limit: int) -> pd.DataFrame:
+        records = []
+        for path in sorted(hits):
+            c = self._cells[path]
+            for ix in hits[path]:
+                row_mask = (c.sheet == c.sheet[ix]) & (c.row == c.row[ix])
+                records.append({
+                    "File": os.path.basename(path),
+                    "Sheet": c.sheets[c.sheet[ix]],
+                    "Cell": f"{_col_letter(int(c.col[ix]))}{int(c.row[ix]) + 1}",
+                    "Value": c.text[ix],
+                    "Row": " | ".join(c.text[j] for j in np.flatnonzero(row_mask)),
+                    "path": path,
+                })
+                if len(records) >= limit:
+                    return pd.DataFrame(records)
+        return pd.DataFrame(records) if records else _empty_results()
+
+    @property
+    def stats(self) -> dict:
+        return {"files": len(self._cells), "tokens": len(self._tokens), "numeric_cells": len(self._num_values)}
+
+
+def _empty_results() -> pd.DataFrame:
+    return pd.DataFrame(columns=["File", "Sheet", "Cell", "Value", "Row", "path"])
+
+
+_index = SearchIndex()
+
+
+def get_index(lab_dir: str = LAB_DIR) -> SearchIndex:
+    """The process-wide index, brought up to date with `lab_dir`."""
+    _index.update(lab_dir)
+    return _index
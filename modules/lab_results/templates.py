@@ -0,0 +1,145 @@
+# modules/lab_results/templates.py
+"""
+Per-lab workbook templates.
+
+A template declares which sheets to read, where the header row is, which
+columns to keep and their dtypes, the units of each column or field, and (for
+Field/Value sheets) the dtype of the results, so known lab formats are parsed
+with explicit `usecols`/`dtype` instead of generic inference. Workbooks that
+match no template use the generic path in modules/lab_results/workbooks.py.
+
+To support a new lab format, add a LabTemplate to TEMPLATES (more specific
+templates first).
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Literal
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class SheetSpec:
+    sheet: str | int                      # sheet name, or position for unnamed exports
+    columns: dict[str, str]               # header -> dtype, in sheet order
+    header: int = 0                       # 0-based header row
+    layout: Literal["table", "field_value"] = "table"
+    field_col: str | None = None          # field_value layout: name/parameter column
+    value_col: str | None = None          # field_value layout: result column
+    units: dict[str, str] = field(default_factory=dict)  # table: column -> unit; field_value: field -> unit
+    value_dtype: str | None = None        # field_value layout: dtype of the results (text entries -> NaN)
+
+    @property
+    def usecols(self) -> list[str]:
+        return list(self.columns)
+
+    @property
+    def typed_value_col(self) -> str | None:
+        """Column added to field_value sheets holding the results as `value_dtype`."""
+        if self.layout != "field_value" or self.value_dtype is None:
+            return None
+        return f"{self.value_col} (numeric)"
+
+
+@dataclass(frozen=True)
+class LabTemplate:
+    name: str
+    sheets: tuple[SheetSpec, ...]
+    filename_pattern: str | None = None   # optional regex on the file name
+
+    def matches(self, path, xls: pd.ExcelFile) -> bool:
+        if self.filename_pattern and isinstance(path, (str, os.PathLike)):
+            if not re.search(self.filename_pattern, os.path.basename(path), re.IGNORECASE):
+                return False
+        first = self.sheets[0]
+        sheet = _resolve_sheet(xls, first.sheet)
+        if sheet is None:
+            return False
+        headers = xls.parse(sheet, header=first.header, nrows=0).columns
+        return [str(c).strip() for c in headers] == first.usecols
+
+    def parse(self, xls: pd.ExcelFile) -> dict[str, pd.DataFrame]:
+        sheets: dict[str, pd.DataFrame] = {}
+        for spec in self.sheets:
+            sheet = _resolve_sheet(xls, spec.sheet)
+            if sheet is None:
+                continue
+            df = xls.parse(sheet, header=spec.header, usecols=spec.usecols, dtype=spec.columns)
+            df.attrs.update(
+                template=self.name,
+                layout=spec.layout,
+                field_col=spec.field_col,
+                value_col=spec.value_col,
+                units=dict(spec.units),
+                typed_value_col=spec.typed_value_col,
+            )
+            if spec.typed_value_col is not None:
+                # The result column mixes header text ("TBC", dates) with numbers: keep it as
+                # displayed and add the typed results next to it
+                df[spec.typed_value_col] = pd.to_numeric(df[spec.value_col], errors="coerce").astype(spec.value_dtype)
+            sheets[sheet] = df
+        return sheets
+
+
+def _resolve_sheet(xls: pd.ExcelFile, sheet: str | int) -> str | None:
+    names = xls.sheet_names
+    if isinstance(sheet, int):
+        return names[sheet] if sheet < len(names) else None
+    return sheet if sheet in names else None
+
+
+_FIELD_VALUE = {"Test Category": "string", "Test Name": "string", "Field": "string", "Value": "string"}
+
+_ELEMENTS = ("Aluminium", "Calcium", "Iron", "Magnesium", "Sodium", "Phosphorus", "Potassium", "Silicon",
+             "Titanium", "Arsenic", "Cadmium", "Cobalt", "Chromium", "Copper", "Mercury", "Manganese",
+             "Molybdenum", "Nickel", "Lead", "Antimony", "Vanadium", "Zinc")
+
+# Field -> unit for the fields both Field/Value formats report (pH and the H/C, O/C ratios are unitless)
+_FIELD_UNITS = {
+    "Carbon (C) %": "%",
+    "Hydrogen (H) %": "%",
+    "Nitrogen (N) %": "%",
+    "Sulphur (S) %": "%",
+    "Oxygen (O) % (by diff)": "%",
+    "% Volatile Solids": "%",
+    "% Ash": "%",
+    "As-Received Moisture %": "%",
+    "Porosity Percent": "%",
+    "HHV (MJ/kg)": "MJ/kg",
+    "Electrical Conductivity (EC)": "dS/m",
+    "PAHs": "mg/kg",
+    "PAHs (mg/kg)": "mg/kg",
+    "Carboxylic groups (mmol/g)": "mmol/g",
+    "Phenolic groups (mmol/g)": "mmol/g",
+    "Lactonic groups (mmol/g)": "mmol/g",
+    "Specific Surface Area (m2/g)": "m2/g",
+    "CEC (cmol+/kg)": "cmol+/kg",
+    **{f"{element} (mg/kg)": "mg/kg" for element in _ELEMENTS},
+}
+
+TEMPLATES: list[LabTemplate] = [
+    # Celignis Analysis_Summary export: one Field/Value sheet, no notes column
+    LabTemplate(
+        name="Celignis Analysis Summary",
+        filename_pattern=r"^Celignis_.*Analysis_Summary",
+        sheets=(SheetSpec(sheet=0, columns=_FIELD_VALUE, layout="field_value",
+                          field_col="Field", value_col="Value", units=_FIELD_UNITS, value_dtype="float64"),),
+    ),
+    # In-house testing sheet (TP_EXAMPLE): Field/Value plus a free-text Notes column
+    LabTemplate(
+        name="Testing Programme Summary",
+        sheets=(SheetSpec(sheet=0, columns={**_FIELD_VALUE, "Notes": "string"}, layout="field_value",
+                          field_col="Field", value_col="Value", units=_FIELD_UNITS, value_dtype="float64"),),
+    ),
+]
+
+
+def match_template(path, xls: pd.ExcelFile) -> LabTemplate | None:
+    for template in TEMPLATES:
+        try:
+            if template.matches(path, xls):
+                return template
+        except Exception:
+            continue  # malformed sheet for this template; try the next one
+    return None
@@ -0,0 +1,124 @@
+# modules/lab_results/workbooks.py
+"""
+Parsing and caching of lab result workbooks.
+
+Parsed workbooks are kept in a registry-managed memory cache and checkpointed
+to disk, keyed by file content, so reopening a workbook (or the first open
+after a restart, or after the memory copy was evicted) does not go back
+through openpyxl.
+"""
+import hashlib
+import os
+import threading
+from collections.abc import Callable
+
+import pandas as pd
+
+from modules import cache
+from modules.checkpoint import content_digest, load_checkpoint, save_checkpoint
+from modules.lab_results.templates import match_template
+
+LAB_DIR = "data/lab_results"
+
+# Bump when the parsed representation changes
+_WORKBOOK_SCHEMA = 4
+
+# path -> (stat signature, sheets); evictable, the disk checkpoint backs it
+_cache = cache.register("workbooks")
+
+
+def list_workbooks(lab_dir: str = LAB_DIR) -> list[str]:
+    """Workbook filenames in `lab_dir`, case-insensitively sorted."""
+    if not os.path.isdir(lab_dir):
+        return []
+    return sorted((f for f in os.listdir(lab_dir) if f.lower().endswith(".xlsx")), key=str.lower)
+
+
+def stat_signature(path: str) -> tuple[int, int]:
+    st_ = os.stat(path)
+    return (st_.st_mtime_ns, st_.st_size)
+
+
+def read_excel(file) -> dict[str, pd.DataFrame]:
+    """Parse with the matching lab template (typed, only the declared sheets/columns), else generically."""
+    with pd.ExcelFile(file) as xls:
+        template = match_template(file, xls)
+        if template is not None:
+            return template.parse(xls)
+        # Generic fallback: pandas already infers numeric columns
+        return {name: xls.parse(name) for name in xls.sheet_names}
+
+
+def _checkpoint_name(path: str) -> str:
+    key = hashlib.blake2b(os.path.abspath(path).encode(), digest_size=8).hexdigest()
+    return f"workbook-{key}"
+
+
+def load_workbook(path: str) -> dict[str, pd.DataFrame]:
+    """
+    Parsed sheets for `path`, from memory, then disk checkpoint, then openpyxl.
+    The returned frames are shared: copy before mutating.
+    """
+    signature = stat_signature(path)
+    hit = _cache.get(path)
+    if hit and hit[0] == signature:
+        return hit[1]
+
+    digest = content_digest(path, full=True)
+    name = _checkpoint_name(path)
+    sheets = load_checkpoint(name, fingerprint=digest, schema=_WORKBOOK_SCHEMA)
+    if sheets is None:
+        sheets = read_excel(path)
+        save_checkpoint(name, sheets, fingerprint=digest, schema=_WORKBOOK_SCHEMA)
+
+    _cache.set(path, (signature, sheets))
+    return sheets
+
+
+class WorkbookIndex:
+    """
+    Per-workbook derived data (sample IDs, analyte rows, ...) kept up to date
+    incrementally. `build(path)` only runs for new files or files whose content
+    changed; after a redeploy (new mtimes, same bytes) entries are revalidated
+    by content digest. Entries are checkpointed under `name`.
+    """
+
+    def __init__(self, name: str, build: Callable[[str], object], schema: int = 1):
+        self.name = name
+        self.build = build
+        self.schema = schema
+        self._entries: dict[str, dict] | None = None  # path -> {"signature", "digest", "value"}
+        self._lock = threading.Lock()
+        self._resident = cache.register(name, evictable=False)
+
+    def _refresh(self, path: str, old: dict | None) -> dict:
+        signature = stat_signature(path)
+        if old and old["signature"] == signature:
+            return old
+        digest = content_digest(path, full=True)
+        if old and old["digest"] == digest:
+            return {**old, "signature": signature}
+        return {"signature": signature, "digest": digest, "value": self.build(path)}
+
+    def update(self, lab_dir: str = LAB_DIR) -> tuple[dict[str, dict], bool]:
+        """Return ({path: entry}, changed). Entries are shared: don't mutate."""
+        with self._lock:
+            if self._entries is None:
+                self._entries = load_checkpoint(self.name, schema=self.schema, check_fingerprint=False) or {}
+                self._resident.set("entries", self._entries)
+            entries = self._entries
+            seen: dict[str, dict] = {}
+            for fname in list_workbooks(lab_dir):
+                path = os.path.join(lab_dir, fname)
+                try:
+                    seen[path] = self._refresh(path, entries.get(path))
+                except FileNotFoundError:
+                    continue  # removed while scanning
+
+            changed = seen.keys() != entries.keys() or any(seen[p] is not entries.get(p) for p in seen)
+            if not changed:
+                return entries, False
+            self._entries = seen
+            self._resident.set("entries", seen)
+            save_checkpoint(self.name, seen, schema=self.schema)
+            return seen, True
@@ -0,0 +1,417 @@
+# modules/loadtest.py
+"""
+Concurrent-session load test for the dashboard.
+
+Starts the app with `streamlit run` on a local port and drives N simulated
+browser sessions against it over Streamlit's websocket protocol (the same
+BackMsg/ForwardMsg protobufs the frontend sends). Each session keeps its own
+widget state and repeatedly picks an action: switch tank, toggle raw data,
+rerun the dashboard, open a lab workbook, or download its PDF. Each action is
+timed from the first request to the last `script_finished` (page switches and
+st.rerun included); downloads include fetching the file over HTTP.
+
+For each concurrency level the tool reports p50/p95/p99 rerun latency and the
+server process's CPU use and RSS, so levels can be compared as N grows. The
+same server is kept across levels, as in production.
+
+AppTest is not used here: it swaps a global mock runtime per run, so several
+AppTests in one process cannot run concurrently.
+
+CLI:
+    python -m modules.loadtest --sessions 1,5,10,20 --duration 30 --think 0.5
+"""
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import ClientConnection, connect
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = "Millie_Dashboard.py"
+
+# Page url_pathnames as Streamlit derives them from the pages/ file names
+ARRAY_PAGE = "Phycotank_Array"
+DETAIL_PAGE = "lab_results_detail"
+
+ACTIONS = ("switch_tank", "toggle_raw", "dashboard", "open_lab_detail", "download_pdf")
+STARTUP_TIMEOUT_S = 60.0
+RERUN_TIMEOUT_S = 120.0
+
+
+@dataclass
+class LevelResult:
+    sessions: int
+    seconds: float
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: list[str] = field(default_factory=list)
+    cpu_s: float = 0.0
+    rss_mb: float = 0.0
+    peak_rss_mb: float = 0.0
+
+    @property
+    def all_latencies(self) -> list[float]:
+        return [x for values in self.latencies.values() for x in values]
+
+    @property
+    def cpu_percent(self) -> float:
+        return 100.0 * self.cpu_s / self.seconds if self.seconds else 0.0
+
+    def percentiles(self, values: list[float] | None = None) -> tuple[float, float, float]:
+        values = self.all_latencies if values is None else values
+        if not values:
+            return (float("nan"),) * 3
+        p50, p95, p99 = np.percentile(np.asarray(values) * 1000.0, [50, 95, 99])
+        return p50, p95, p99
+
+    def summary(self) -> str:
+        p50, p95, p99 = self.percentiles()
+        n = len(self.all_latencies)
+        return (
+            f"{self.sessions:>4} sessions | {n:>6,} reruns ({n / self.seconds:,.1f}/s) | "
+            f"p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  p99 {p99:7.1f} ms | "
+            f"CPU {self.cpu_percent:5.0f}% | RSS {self.rss_mb:,.0f} MB (peak {self.peak_rss_mb:,.0f}) | "
+            f"errors {len(self.errors)}"
+        )
+
+
+# ---------- Server ----------
+class Server:
+    """`streamlit run` in a subprocess, with CPU/RSS read from /proc (Linux)."""
+
+    def __init__(self, port: int | None = None, script: str = MAIN_SCRIPT):
+        self.port = port or _free_port()
+        self.script = script
+        self.proc: subprocess.Popen | None = None
+
+    @property
+    def http_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def start(self) -> "Server":
+        self.proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", self.script,
+                "--server.headless", "true",
+                "--server.port", str(self.port),
+                "--server.fileWatcherType", "none",
+                "--browser.gatherUsageStats", "false",
+            ],
+            cwd=APP_ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT_S
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"streamlit exited with code {self.proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"{self.http_url}/_stcore/health", timeout=1) as r:
+                    if r.status == 200:
+                        return self
+            except OSError:
+                time.sleep(0.25)
+        self.stop()
+        raise RuntimeError(f"streamlit did not become healthy within {STARTUP_TIMEOUT_S:.0f}s")
+
+    def stop(self) -> None:
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+    def cpu_seconds(self) -> float:
+        with open(f"/proc/{self.proc.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def rss_mb(self, peak: bool = False) -> float:
+        key = "VmHWM:" if peak else "VmRSS:"
+        with open(f"/proc/{self.proc.pid}/status") as f:
+            for line in f:
+                if line.startswith(key):
+                    return int(line.split()[1]) / 1024.0
+        return 0.0
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ---------- Sessions ----------
+class Session:
+    """
+    One simulated browser tab. Like the frontend, it resends the full widget
+    state of the current page on every rerun.
+    """
+
+    def __init__(self, server: Server, ws: ClientConnection, rng: random.Random):
+        self.server = server
+        self.ws = ws
+        self.rng = rng
+        self.pages: dict[str, str] = {}          # url_pathname -> page_script_hash
+        self.page_hash = ""
+        self.main_hash = ""
+        self.session_id = ""
+        self.elements: dict[tuple[str, str], object] = {}  # (type, label) -> element proto
+        self.states: dict[str, WidgetState] = {}
+
+    # ----- protocol -----
+    def _send(self, msg: BackMsg) -> None:
+        self.ws.send(msg.SerializeToString())
+
+    def _recv(self) -> ForwardMsg:
+        msg = ForwardMsg()
+        msg.ParseFromString(self.ws.recv(timeout=RERUN_TIMEOUT_S))
+        return msg
+
+    def rerun(self, page_hash: str | None = None, widgets: list[WidgetState] = ()) -> None:
+        """Send a rerun and block until the script finishes (following st.rerun/switch_page)."""
+        target = self.page_hash if page_hash is None else page_hash
+        if target != self.page_hash:
+            self.states.clear()
+        for ws in widgets:
+            if ws.WhichOneof("value") != "trigger_value":
+                self.states[ws.id] = ws
+
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.page_script_hash = target
+        state.widget_states.widgets.extend(self.states.values())
+        state.widget_states.widgets.extend(w for w in widgets if w.WhichOneof("value") == "trigger_value")
+        self._send(msg)
+
+        errors = []
+        while True:
+            fwd = self._recv()
+            kind = fwd.WhichOneof("type")
+            if kind == "navigation":  # the pages/ directory, sent as st.navigation
+                self.pages = {p.url_pathname: p.page_script_hash for p in fwd.navigation.app_pages}
+                self.main_hash = self.pages.get("", self.main_hash)
+            elif kind == "new_session":
+                if fwd.new_session.HasField("initialize"):
+                    self.session_id = fwd.new_session.initialize.session_id
+                if fwd.new_session.page_script_hash != self.page_hash:
+                    self.states.clear()
+                self.page_hash = fwd.new_session.page_script_hash
+                self.elements = {}
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                etype = element.WhichOneof("type")
+                if etype == "exception":
+                    errors.append(element.exception.message)
+                else:
+                    proto = getattr(element, etype)
+                    label = getattr(proto, "label", "")
+                    self.elements[(etype, label)] = proto
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    errors.append("compile error")
+                break
+        if errors:
+            raise RuntimeError(errors[0])
+
+    def element(self, etype: str, label: str):
+        try:
+            return self.elements[(etype, label)]
+        except KeyError:
+            raise RuntimeError(f"no {etype} labelled {label!r} on the page") from None
+
+    def goto(self, page: str) -> None:
+        if page not in self.pages:
+            raise RuntimeError(f"page {page!r} not found (have {sorted(self.pages)})")
+        if self.pages[page] != self.page_hash:
+            self.rerun(self.pages[page])
+
+    def download(self, label: str) -> int:
+        """Resolve a deferred download button and fetch the file; returns its size."""
+        button = self.element("download_button", label)
+        msg = BackMsg()
+        req = msg.backend_operation_request
+        req.request_id = uuid.uuid4().hex
+        req.session_id = self.session_id
+        if button.deferred_file_id:
+            req.deferred_file.file_id = button.deferred_file_id
+            self._send(msg)
+            while True:
+                fwd = self._recv()
+                if fwd.WhichOneof("type") == "backend_operation_response" and \
+                        fwd.backend_operation_response.request_id == req.request_id:
+                    resp = fwd.backend_operation_response
+                    if resp.error_msg:
+                        raise RuntimeError(resp.error_msg)
+                    url = resp.deferred_file.url
+                    break
+        else:
+            url = button.url
+        with urllib.request.urlopen(self.server.http_url + url, timeout=RERUN_TIMEOUT_S) as r:
+            return len(r.read())
+
+    # ----- actions -----
+    def switch_tank(self) -> None:
+        self.goto(ARRAY_PAGE)
+        box = self.element("selectbox", "Select a phycotank")
+        ws = WidgetState(id=box.id, string_value=self.rng.choice(list(box.options)))
+        self.rerun(widgets=[ws])
+
+    def toggle_raw(self) -> None:
+        self.goto(ARRAY_PAGE)
+        box = self.element("checkbox", "Show raw data")
+        current = self.states.get(box.id)
+        value = not (current.bool_value if current else box.default)
+        self.rerun(widgets=[WidgetState(id=box.id, bool_value=value)])
+
+    def dashboard(self) -> None:
+        self.rerun(self.main_hash)
+
+    def open_lab_detail(self) -> None:
+        self.goto(DETAIL_PAGE)
+        if ("button", "← Back to Lab Results (List)") in self.elements and \
+                ("selectbox", "Select a lab results workbook") not in self.elements:
+            back = self.element("button", "← Back to Lab Results (List)")
+            self.rerun(widgets=[WidgetState(id=back.id, trigger_value=True)])
+            self.goto(DETAIL_PAGE)
+        box = self.elements.get(("selectbox", "Select a lab results workbook"))
+        if box is None:
+            return  # no workbooks to open
+        choice = WidgetState(id=box.id, string_value=self.rng.choice(list(box.options)))
+        open_btn = self.element("button", "Open selected")
+        self.rerun(widgets=[choice, WidgetState(id=open_btn.id, trigger_value=True)])
+
+    def download_pdf(self) -> None:
+        if ("download_button", "Download as PDF") not in self.elements:
+            self.open_lab_detail()
+        if ("download_button", "Download as PDF") in self.elements:
+            self.download("Download as PDF")
+
+    def act(self, action: str) -> None:
+        getattr(self, action)()
+
+
+def _session_loop(server: Server, result: LevelResult, lock: threading.Lock, stop: threading.Event,
+                  started: threading.Barrier, seed: int, think: float) -> None:
+    rng = random.Random(seed)
+    try:
+        with connect(server.ws_url, subprotocols=["streamlit"], max_size=None,
+                     open_timeout=STARTUP_TIMEOUT_S) as ws:
+            session = Session(server, ws, rng)
+            session.rerun()
+            started.wait()
+            _drive(session, result, lock, stop, rng, think)
+    except threading.BrokenBarrierError:
+        pass  # another session failed to start
+    except Exception as e:
+        with lock:
+            result.errors.append(f"startup: {e}")
+        started.abort()
+
+
+def _drive(session: Session, result: LevelResult, lock: threading.Lock, stop: threading.Event,
+           rng: random.Random, think: float) -> None:
+    while not stop.is_set():
+        action = rng.choice(ACTIONS)
+        t0 = time.perf_counter()
+        try:
+            session.act(action)
+        except Exception as e:
+            with lock:
+                result.errors.append(f"{action}: {e}")
+        else:
+            with lock:
+                result.latencies[action].append(time.perf_counter() - t0)
+        stop.wait(rng.uniform(0.5, 1.5) * think)
+
+
+def run_level(server: Server, sessions: int, duration: float, think: float, seed: int = 0) -> LevelResult:
+    """Run `sessions` concurrent sessions for `duration` seconds once they have all connected."""
+    result = LevelResult(sessions=sessions, seconds=duration)
+    lock = threading.Lock()
+    stop = threading.Event()
+    started = threading.Barrier(sessions + 1)
+    threads = [
+        threading.Thread(
+            target=_session_loop,
+            args=(server, result, lock, stop, started, seed + i, think),
+            name=f"loadtest-session-{i}",
+            daemon=True,
+        )
+        for i in range(sessions)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        started.wait()
+    except threading.BrokenBarrierError:
+        stop.set()
+        for t in threads:
+            t.join()
+        return result
+
+    cpu0, t0 = server.cpu_seconds(), time.perf_counter()
+    rss_samples = []
+    while time.perf_counter() - t0 < duration:
+        rss_samples.append(server.rss_mb())
+        time.sleep(min(0.5, duration))
+    stop.set()
+    for t in threads:
+        t.join()
+
+    result.seconds = time.perf_counter() - t0
+    result.cpu_s = server.cpu_seconds() - cpu0
+    result.rss_mb = float(np.median(rss_samples))
+    result.peak_rss_mb = server.rss_mb(peak=True)
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the dashboard with concurrent sessions.")
+    parser.add_argument("--sessions", default="1,5,10,20", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per level")
+    parser.add_argument("--think", type=float, default=0.5, help="Mean pause between actions per session")
+    parser.add_argument("--port", type=int, help="Port for the app under test (default: any free port)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--by-action", action="store_true", help="Also print percentiles per action")
+    args = parser.parse_args(argv)
+
+    levels = [int(n) for n in args.sessions.split(",") if n.strip()]
+    server = Server(port=args.port).start()
+    print(f"Server pid {server.proc.pid} on {server.http_url}, RSS {server.rss_mb():,.0f} MB at start", flush=True)
+    try:
+        for n in levels:
+            result = run_level(server, n, args.duration, args.think, seed=args.seed)
+            print(result.summary(), flush=True)
+            if args.by_action:
+                for action in ACTIONS:
+                    values = result.latencies.get(action, [])
+                    p50, p95, p99 = result.percentiles(values)
+                    print(f"       {action:<16} n={len(values):<6} p50 {p50:7.1f}  p95 {p95:7.1f}  p99 {p99:7.1f} ms")
+            for err in sorted(set(result.errors))[:5]:
+                print(f"       error: {err}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# modules/pdf.py
+"""
+Shared Nellie PDF layout (pure Python, ReportLab): portrait A4, confidentiality
+footer on every page, wordmark on the last page, and the standard table style.
+Used by the lab result PDFs and the telemetry reports.
+"""
+import io
+import os
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+FOOTER_TEXT = (
+    "admin@nellie.tech  |  The information contained is private and confidential. "
+    "All rights reserved."
+)
+WORDMARK_PATH = "assets/nellie_wordmark.png"
+
+TABLE_STYLE = TableStyle([
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, -1), 8),
+    ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#2F3B52")),
+    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.HexColor("#F7F9FC")]),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#D3DAE6")),
+    ("LEFTPADDING", (0, 0), (-1, -1), 4),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+    ("TOPPADDING", (0, 0), (-1, -1), 2),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+])
+
+
+class NumberedCanvas(canvas.Canvas):
+    """Defers page output until save() so the footer knows the page count."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._saved_page_states = []
+
+    def showPage(self):
+        self._saved_page_states.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        num_pages = len(self._saved_page_states)
+        for state in self._saved_page_states:
+            self.__dict__.update(state)
+            self.draw_page_footer(num_pages)
+            super().showPage()
+        super().save()
+
+    def draw_page_footer(self, num_pages: int):
+        y = 8 * mm
+        x = 12 * mm
+
+        self.setFont("Helvetica", 7)
+        self.drawString(x, y + 5, FOOTER_TEXT)
+
+        if self._pageNumber == num_pages and os.path.exists(WORDMARK_PATH):
+            self.drawImage(
+                ImageReader(WORDMARK_PATH),
+                x,
+                y + 12,
+                width=60 * mm,
+                preserveAspectRatio=True,
+                mask="auto",
+            )
+
+
+def df_to_table_block(df: pd.DataFrame, max_rows_for_pdf: int = 60):
+    header = [str(c) for c in df.columns]
+    body_rows = df.head(max_rows_for_pdf).fillna("").astype(str).values.tolist()
+    tbl = Table([header] + body_rows, repeatRows=1)
+    tbl.setStyle(TABLE_STYLE)
+    return tbl
+
+
+def title_block(title: str, styles=None) -> list:
+    """Title + 'Generated:' timestamp (UK time) flowables."""
+    styles = styles or getSampleStyleSheet()
+    now_uk = datetime.now(ZoneInfo("Europe/London")).strftime("%A, %d %B %Y, %H:%M:%S")
+    return [
+        Paragraph(f"<b>{title}</b>", styles["Title"]),
+        Spacer(1, 4),
+        Paragraph(f"Generated: {now_uk}", styles["Normal"]),
+        Spacer(1, 8),
+    ]
+
+
+def render_pdf(story: list) -> bytes:
+    """Portrait A4 PDF. Footer on every page. Logo only on last page, left-aligned."""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=12 * mm,
+        rightMargin=12 * mm,
+        topMargin=10 * mm,
+        bottomMargin=18 * mm,
+    )
+    doc.build(story, canvasmaker=NumberedCanvas)
+    return buffer.getvalue()
@@ -0,0 +1,147 @@
+# modules/telemetry/export.py
+"""
+Streaming export of phycotank telemetry to CSV or Parquet.
+
+Data is pulled from the storage layer chunk by chunk and written straight to
+the destination (one Parquet row group per chunk), so a full-history export
+never materialises the whole frame. History that retention has compacted is
+read from the rollup tiers (bucket means), so exports cover the whole range;
+`resolution` can also roll recent data up to hourly or daily.
+
+CLI:
+    python -m modules.telemetry.export -o out.parquet --tanks PT01,PT02 \
+        --start 2025-07-28 --end "2025-07-29 12:00" [--resolution hourly]
+"""
+import argparse
+import os
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from modules.telemetry import retention, store
+
+FORMATS = ("csv", "parquet")
+MIME_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+@dataclass
+class ExportStats:
+    rows: int = 0
+    bytes: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_s(self) -> float:
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.rows:,} rows, {self.bytes / 1e6:,.2f} MB in {self.seconds:.2f}s "
+            f"({self.rows_per_s:,.0f} rows/s, {self.bytes_per_s / 1e6:,.2f} MB/s)"
+        )
+
+
+def _write_csv(chunks, dest: str, stats: ExportStats, on_chunk) -> None:
+    with open(dest, "w", newline="", encoding="utf-8") as f:
+        for chunk in chunks:
+            chunk.to_csv(f, header=stats.chunks == 0, index=False)
+            stats.rows += len(chunk)
+            stats.chunks += 1
+            stats.bytes = f.tell()
+            if on_chunk:
+                on_chunk(stats)
+        if stats.chunks == 0:
+            f.write(",".join(store.COLUMNS) + "\n")
+            stats.bytes = f.tell()
+
+
+def _write_parquet(chunks, dest: str, stats: ExportStats, on_chunk) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow).") from e
+
+    schema = pa.schema(
+        [("timestamp", pa.timestamp("ns")), ("phycotank_id", pa.string())]
+        + [(m, pa.float64()) for m in store.METRICS]
+    )
+    with pq.ParquetWriter(dest, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            # One row group per storage chunk
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            stats.rows += len(chunk)
+            stats.chunks += 1
+            stats.bytes = os.path.getsize(dest)
+            if on_chunk:
+                on_chunk(stats)
+    stats.bytes = os.path.getsize(dest)
+
+
+def export_telemetry(
+    dest: str,
+    fmt: str = "csv",
+    tanks: Iterable[str] | None = None,
+    start=None,
+    end=None,
+    chunk_rows: int = store.DEFAULT_CHUNK_ROWS,
+    on_chunk: Callable[[ExportStats], None] | None = None,
+    resolution: str = "raw",
+) -> ExportStats:
+    """
+    Stream the selected tanks and time window to `dest` as CSV or Parquet.
+    At "raw" resolution, compacted periods come out as hourly/daily means.
+    `on_chunk` is called after every chunk with the running stats (for progress).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+    if resolution not in retention.RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {resolution!r}; expected one of {retention.RESOLUTIONS}")
+
+    stats = ExportStats()
+    t0 = time.perf_counter()
+    chunks = retention.iter_query(tanks, start, end, resolution=resolution, chunk_rows=chunk_rows)
+
+    if fmt == "csv":
+        _write_csv(chunks, dest, stats, on_chunk)
+    else:
+        _write_parquet(chunks, dest, stats, on_chunk)
+
+    stats.seconds = time.perf_counter() - t0
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Export phycotank telemetry to CSV or Parquet.")
+    parser.add_argument("-o", "--output", required=True, help="Destination file")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the output file extension")
+    parser.add_argument("--tanks", help="Comma-separated tank IDs (default: all)")
+    parser.add_argument("--start", help="Start timestamp (inclusive)")
+    parser.add_argument("--end", help="End timestamp (inclusive)")
+    parser.add_argument("--chunk-rows", type=int, default=store.DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--resolution", choices=retention.RESOLUTIONS, default="raw",
+                        help="raw (compacted periods as rollup means), hourly or daily")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("parquet" if args.output.lower().endswith(".parquet") else "csv")
+    tanks = [t.strip() for t in args.tanks.split(",") if t.strip()] if args.tanks else None
+
+    stats = export_telemetry(
+        args.output,
+        fmt=fmt,
+        tanks=tanks,
+        start=args.start,
+        end=args.end,
+        chunk_rows=args.chunk_rows,
+        resolution=args.resolution,
+    )
+    print(f"Wrote {args.output}: {stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# modules/telemetry/ingest.py
+"""
+Local sensor ingest endpoint for the Mwyndy Cross array.
+
+Readings are POSTed in batches to /write, either as JSON or as line protocol:
+
+    JSON         [{"timestamp": "2025-07-28 00:00:00", "phycotank_id": "PT01", "pH": 7.6, ...}, ...]
+                 (a single object or {"readings": [...]} is also accepted)
+    line proto   phycotank,tank=PT01 pH=7.6,temperature_C=23.8 1753660800000000000
+
+Every accepted batch is appended to a write-ahead log (JSON lines, fsynced)
+before the request is acknowledged. A committer thread drains the WAL into the
+telemetry store in batches, so dashboard reads never wait on individual
+requests. On start-up any uncommitted WAL entries are replayed; rows already
+present in the store are skipped, so a crash mid-commit never duplicates data.
+
+Run:
+    python -m modules.telemetry.ingest --port 8765
+"""
+import argparse
+import json
+import math
+import os
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from modules.telemetry import store
+
+WAL_DIR = "data/telemetry"
+WAL_PATH = os.path.join(WAL_DIR, "ingest.wal")
+
+DEFAULT_PORT = 8765
+COMMIT_INTERVAL_S = 1.0
+COMMIT_BATCH_ROWS = 5_000
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class IngestError(ValueError):
+    """Raised for payloads that cannot be turned into readings (HTTP 400)."""
+
+
+# ---------- Parsing ----------
+def _normalise(reading: dict) -> dict:
+    if not isinstance(reading, dict):
+        raise IngestError(f"Each reading must be an object, got {reading!r}")
+    tank = reading.get("phycotank_id") or reading.get("tank")
+    if not tank:
+        raise IngestError("Reading is missing 'phycotank_id'")
+    try:
+        ts = pd.Timestamp(reading.get("timestamp") or pd.Timestamp.now(tz="UTC"))
+    except (TypeError, ValueError) as e:
+        raise IngestError(f"Bad timestamp {reading.get('timestamp')!r}") from e
+    if pd.isna(ts):  # "NaT" parses without raising
+        raise IngestError(f"Bad timestamp {reading.get('timestamp')!r}")
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+
+    row = {"timestamp": ts.strftime(store.TIMESTAMP_FORMAT), "phycotank_id": str(tank)}
+    for metric in store.METRICS:
+        value = reading.get(metric)
+        if value is None:
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError) as e:
+            raise IngestError(f"{metric} must be numeric, got {value!r}") from e
+        if math.isfinite(value):
+            row[metric] = value
+    return row
+
+
+def _parse_line_protocol(text: str) -> list[dict]:
+    readings = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split(" ")
+        if len(parts) not in (2, 3):
+            raise IngestError(f"Malformed line: {line!r}")
+        _measurement, *tags = parts[0].split(",")
+        reading = dict(t.split("=", 1) for t in tags if "=" in t)
+        for field in parts[1].split(","):
+            key, _, value = field.partition("=")
+            reading[key] = value.rstrip("i")
+        if len(parts) == 3:
+            try:
+                reading["timestamp"] = pd.Timestamp(int(parts[2]), unit="ns")
+            except (ValueError, OverflowError) as e:
+                raise IngestError(f"Bad timestamp in line: {line!r}") from e
+        readings.append(reading)
+    return readings
+
+
+def parse_payload(body: bytes, content_type: str = "") -> list[dict]:
+    """Turn a request body into normalised readings (timestamp string, tank, metrics)."""
+    text = body.decode("utf-8")
+    stripped = text.lstrip()
+    if "json" in content_type or stripped.startswith(("{", "[")):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise IngestError(f"Invalid JSON: {e}") from e
+        if isinstance(data, dict):
+            data = data.get("readings", [data])
+        if not isinstance(data, list):
+            raise IngestError("Expected a list of readings")
+        raw = data
+    else:
+        raw = _parse_line_protocol(text)
+    return [_normalise(r) for r in raw]
+
+
+# ---------- Write-ahead log ----------
+class WriteAheadLog:
+    """
+    Append-only JSON-lines log with a committed-offset marker.
+    `<path>.offset` holds the byte offset up to which entries are in the store.
+    """
+
+    def __init__(self, path: str = WAL_PATH):
+        self.path = path
+        self.offset_path = path + ".offset"
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def append(self, readings: list[dict]) -> None:
+        payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in readings).encode("utf-8")
+        with self._lock:
+            os.write(self._fd, payload)
+            os.fsync(self._fd)
+
+    def committed_offset(self) -> int:
+        try:
+            with open(self.offset_path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_offset(self, offset: int) -> None:
+        tmp = self.offset_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.offset_path)
+
+    def read_pending(self, max_rows: int | None = None) -> tuple[list[dict], int]:
+        """Return (readings, end_offset) for uncommitted entries (complete lines only)."""
+        start = self.committed_offset()
+        if start > os.path.getsize(self.path):
+            start = 0  # marker left behind by a truncation; everything in the log is pending
+        readings: list[dict] = []
+        end = start
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write at the tail; picked up once complete
+                end += len(line)
+                if line.strip():
+                    readings.append(json.loads(line))
+                if max_rows and len(readings) >= max_rows:
+                    break
+        return readings, end
+
+    def mark_committed(self, offset: int) -> None:
+        with self._lock:
+            if offset >= os.fstat(self._fd).st_size:
+                # Fully drained: truncate so the log does not grow forever. Offset 0 is
+                # persisted first; a crash in between only replays entries that the
+                # startup commit(dedupe=True) drops, never skips new ones.
+                self._write_offset(0)
+                os.ftruncate(self._fd, 0)
+                return
+            self._write_offset(offset)
+
+
+# ---------- Committer ----------
+class Committer(threading.Thread):
+    """Background thread that drains the WAL into the telemetry store in batches."""
+
+    def __init__(self, wal: WriteAheadLog, interval: float = COMMIT_INTERVAL_S,
+                 batch_rows: int = COMMIT_BATCH_ROWS, store_path: str = store.TELEMETRY_CSV):
+        super().__init__(name="telemetry-committer", daemon=True)
+        self.wal = wal
+        self.interval = interval
+        self.batch_rows = batch_rows
+        self.store_path = store_path
+        self._stop_event = threading.Event()
+        self.committed_rows = 0
+
+    def commit(self, dedupe: bool = False) -> int:
+        """Commit everything pending. Returns rows written to the store."""
+        written = 0
+        while True:
+            readings, end = self.wal.read_pending(self.batch_rows)
+            if not readings:
+                if end != self.wal.committed_offset():
+                    self.wal.mark_committed(end)
+                return written
+            df = pd.DataFrame(readings, columns=store.COLUMNS)
+            df = df.astype(store.DTYPES)
+            df["timestamp"] = pd.to_datetime(df["timestamp"], format=store.TIMESTAMP_FORMAT)
+            with store.write_lock(self.store_path):
+                if dedupe:
+                    df = self._drop_already_stored(df)
+                if not df.empty:
+                    store.append(df, self.store_path)
+            self.wal.mark_committed(end)
+            written += len(df)
+            self.committed_rows += len(df)
+
+    def _drop_already_stored(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Replay after a crash between store append and offset update
+        if not os.path.exists(self.store_path):
+            return df
+        keys = ["timestamp", "phycotank_id"]
+        stored = store.load(
+            tanks=df["phycotank_id"].unique(),
+            start=df["timestamp"].min(),
+            end=df["timestamp"].max(),
+            path=self.store_path,
+            complete_only=False,  # caller holds write_lock()
+        )[keys]
+        merged = df.merge(stored.drop_duplicates(), on=keys, how="left", indicator=True)
+        return merged.loc[merged["_merge"] == "left_only", df.columns]
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.commit()
+            except Exception as e:  # keep ingesting; retry on the next tick
+                print(f"[ingest] commit failed: {e}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+        self.commit()
+
+
+# ---------- HTTP endpoint ----------
+def _make_handler(wal: WriteAheadLog):
+    class IngestHandler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {"status": "ok"})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/write":
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self._reply(400, {"error": "bad Content-Length"})
+                return
+            if length > MAX_BODY_BYTES:
+                self._reply(413, {"error": "payload too large"})
+                return
+            try:
+                readings = parse_payload(self.rfile.read(length), self.headers.get("Content-Type", ""))
+            except (IngestError, UnicodeDecodeError) as e:
+                self._reply(400, {"error": str(e)})
+                return
+            if readings:
+                wal.append(readings)
+            self._reply(202, {"accepted": len(readings)})
+
+        def log_message(self, format, *args):
+            pass  # one line per batch is too noisy at thousands of readings/s
+
+    return IngestHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, wal_path: str = WAL_PATH,
+          store_path: str = store.TELEMETRY_CSV) -> None:
+    wal = WriteAheadLog(wal_path)
+    committer = Committer(wal, store_path=store_path)
+    replayed = committer.commit(dedupe=True)
+    if replayed:
+        print(f"[ingest] replayed {replayed} readings from {wal_path}")
+    committer.start()
+
+    server = ThreadingHTTPServer((host, port), _make_handler(wal))
+    print(f"[ingest] listening on http://{host}:{port}/write")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        committer.stop()
+        wal.close()
+
+
+# ---------- Client ----------
+def post_readings(readings: list[dict], url: str = f"http://127.0.0.1:{DEFAULT_PORT}/write",
+                  timeout: float = 10.0) -> int:
+    """Send a batch of readings to a running ingest service. Returns the accepted count."""
+    body = json.dumps(readings, default=str).encode("utf-8")
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())["accepted"]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Phycotank sensor ingest service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--wal", default=WAL_PATH)
+    parser.add_argument("--store", default=store.TELEMETRY_CSV)
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.wal, args.store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# modules/telemetry/kpi.py
+"""
+Cumulative operating KPIs per tank and across the array.
+
+    energy_kWh        sum of energy_consumption_kWh (each reading is the energy
+                      used over its interval)
+    light_dose_lux_h  lux integrated over time (trapezoid), in lux·hours
+    throughput_L      flow_rate_lph integrated over time (trapezoid), in litres
+
+A KpiAccumulator keeps, per tank, the running cumulative sums at its readings
+(times + an n × 3 array). update() integrates only rows newer than each tank's
+last reading: it computes per-interval increments for all tanks at once, then
+runs one prefix sum over all of them and subtracts, per tank segment, the sum
+before the segment (plus the tank's running total). Rolling-window rates are
+differences of those prefix sums, C(t) − C(t − W), looked up with searchsorted.
+No refresh ever re-integrates history.
+
+Points are kept at full resolution only for the raw retention window. Older
+points are thinned to the last one per hour, and past the hourly window to the
+last one per day (the rollup tiers' resolutions, see retention.py), so memory
+and per-update cost stay bounded however long the array runs.
+
+Intervals longer than MAX_GAP are not integrated (the light/flow between
+readings is unknown). Rows older than a tank's last integrated reading (late
+data) are ignored.
+
+On start the accumulator is rebuilt from the retention rollups and the raw
+rows, then each tank is anchored to its checkpointed running total, so totals
+carry across restarts and compaction. Only those totals are checkpointed.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from modules.checkpoint import load_checkpoint, save_checkpoint
+from modules.telemetry import retention
+
+# KPI -> (source column, "sum" of interval values or time "integral", unit)
+KPIS = {
+    "energy_kWh": ("energy_consumption_kWh", "sum", "kWh"),
+    "light_dose_lux_h": ("lux", "integral", "lux·h"),
+    "throughput_L": ("flow_rate_lph", "integral", "L"),
+}
+ROLLING_WINDOW = pd.Timedelta(hours=24)
+RATE_UNIT = pd.Timedelta(days=1)   # rolling rates are reported per day
+MAX_GAP = pd.Timedelta(hours=6)
+
+_CHECKPOINT = "telemetry-kpis"
+_SCHEMA = 2
+_NAMES = list(KPIS)
+_SOURCES = [src for src, _, _ in KPIS.values()]
+_INTEGRAL = np.array([how == "integral" for _, how, _ in KPIS.values()])
+_NS_PER_H = 3_600_000_000_000
+_NS_PER_D = 24 * _NS_PER_H
+_NEVER = np.iinfo(np.int64).min
+
+
+@dataclass(frozen=True)
+class TankKpis:
+    """Cumulative KPI values at each integrated reading of one tank (shared arrays: read-only)."""
+    times: np.ndarray   # int64 ns, ascending
+    cum: np.ndarray     # len(times) × len(KPIS)
+
+    def at(self, t: np.ndarray) -> np.ndarray:
+        """Cumulative values at times `t` (last reading at or before each; zeros before the first)."""
+        idx = np.searchsorted(self.times, t, side="right") - 1
+        out = np.zeros((len(t), self.cum.shape[1]))
+        ok = idx >= 0
+        out[ok] = self.cum[idx[ok]]
+        return out
+
+    def frame(self, window: pd.Timedelta = ROLLING_WINDOW) -> pd.DataFrame:
+        """timestamp, cumulative KPIs and their rolling-window rates, one row per reading."""
+        rates = (self.cum - self.at(self.times - window.value)) / (window / RATE_UNIT)
+        return pd.DataFrame({
+            "timestamp": pd.DatetimeIndex(self.times),
+            **{name: self.cum[:, i] for i, name in enumerate(_NAMES)},
+            **{f"{name}_rate": rates[:, i] for i, name in enumerate(_NAMES)},
+        })
+
+
+@dataclass(frozen=True)
+class KpiSummary:
+    """Immutable view published with each telemetry snapshot."""
+    window: pd.Timedelta
+    totals: pd.DataFrame   # per tank: cumulative KPIs, rolling rates, as_of
+    array: pd.DataFrame    # on the snapshot grid: array-wide cumulative KPIs and rolling rates
+    tanks: dict[str, TankKpis] = field(repr=False)
+
+    def headline(self, tank: str | None = None) -> dict[str, tuple[float, float]]:
+        """KPI -> (cumulative, rolling rate) for one tank, or summed over the array."""
+        rows = self.totals if tank is None else self.totals[self.totals["phycotank_id"] == tank]
+        return {name: (float(rows[name].sum()), float(rows[f"{name}_rate"].sum())) for name in _NAMES}
+
+
+def _last_per_bucket(times: np.ndarray, cum: np.ndarray, lo: int, hi: int,
+                     bucket_ns: int) -> tuple[np.ndarray, np.ndarray]:
+    """Keep only the last point of each `bucket_ns` bucket among points in [lo, hi)."""
+    i, j = np.searchsorted(times, [lo, hi])
+    if j - i < 2:
+        return times, cum
+    buckets = times[i:j] // bucket_ns
+    keep = np.r_[np.ones(i, dtype=bool), buckets[1:] != buckets[:-1], True, np.ones(len(times) - j, dtype=bool)]
+    return times[keep], cum[keep]
+
+
+class KpiAccumulator:
+    """Running per-tank KPI prefix sums. Not thread-safe: owned by the aggregation worker."""
+
+    def __init__(self):
+        self._tanks: dict[str, TankKpis] = {}
+        self._carry: dict[str, np.ndarray] = {}  # last reading's source values, for the next trapezoid
+        self._thinned: dict[str, tuple[int, int]] = {}  # points before these (hourly, daily) are thinned
+
+    def __len__(self) -> int:
+        return len(self._tanks)
+
+    @property
+    def last_ts(self) -> pd.Timestamp | None:
+        return max((pd.Timestamp(s.times[-1]) for s in self._tanks.values() if len(s.times)), default=None)
+
+    def _total(self, tank: str) -> np.ndarray:
+        series = self._tanks.get(tank)
+        return series.cum[-1] if series is not None and len(series.times) else np.zeros(len(_NAMES))
+
+    def _extend(self, tanks: pd.Index, bounds: np.ndarray, times: np.ndarray, increments: np.ndarray) -> None:
+        """Append rows grouped by tank (segment i is bounds[i]:bounds[i + 1]) with one prefix sum."""
+        running = np.cumsum(increments, axis=0)
+        before = np.vstack([np.zeros(len(_NAMES)), running[bounds[1:-1] - 1]])
+        base = np.vstack([self._total(tank) for tank in tanks])
+        cum = running + np.repeat(base - before, np.diff(bounds), axis=0)
+        for i, tank in enumerate(tanks):
+            lo, hi = bounds[i], bounds[i + 1]
+            t, c = times[lo:hi], cum[lo:hi]
+            prev = self._tanks.get(tank)
+            if prev is not None:
+                # New arrays, never in-place: published summaries keep sharing the old ones
+                t, c = np.concatenate([prev.times, t]), np.concatenate([prev.cum, c])
+            self._tanks[tank] = TankKpis(t, c)
+        self._thin()
+
+    def _thin(self) -> None:
+        """Full resolution inside the raw retention window; hourly, then daily points before it."""
+        newest = self.last_ts
+        if newest is None:
+            return
+        raw_cutoff, hourly_cutoff = retention.RetentionPolicy().cutoffs(newest)
+        hourly_to, daily_to = raw_cutoff.value, hourly_cutoff.value
+        for tank, series in self._tanks.items():
+            done_hourly, done_daily = self._thinned.get(tank, (_NEVER, _NEVER))
+            if done_hourly >= hourly_to and done_daily >= daily_to:
+                continue
+            times, cum = _last_per_bucket(series.times, series.cum, done_hourly, hourly_to, _NS_PER_H)
+            times, cum = _last_per_bucket(times, cum, done_daily, daily_to, _NS_PER_D)
+            if len(times) < len(series.times):
+                self._tanks[tank] = TankKpis(times, cum)
+            self._thinned[tank] = (max(done_hourly, hourly_to), max(done_daily, daily_to))
+
+    def seed(self, rollups: pd.DataFrame, bucket: pd.Timedelta) -> None:
+        """Start from compacted history: one cumulative point at the end of each rollup bucket."""
+        if rollups.empty:
+            return
+        rollups = rollups.sort_values(["phycotank_id", "timestamp"])
+        hours = bucket / pd.Timedelta(hours=1)
+        inc = np.column_stack([
+            (rollups[f"{src}_mean"].fillna(0.0) * (rollups[f"{src}_count"] if how == "sum" else hours)).to_numpy()
+            for src, how, _ in KPIS.values()
+        ])
+        # Just before the bucket ends, so a raw reading exactly on the boundary is still integrated
+        ends = (rollups["timestamp"] + bucket).to_numpy(dtype="datetime64[ns]").astype(np.int64) - 1
+        codes, tanks = pd.factorize(rollups["phycotank_id"], sort=True)
+        bounds = np.r_[0, np.flatnonzero(np.diff(codes)) + 1, len(codes)]
+        self._extend(tanks, bounds, ends, inc)
+
+    def update(self, df: pd.DataFrame) -> int:
+        """Integrate rows newer than each tank's last reading; returns the number of rows added."""
+        last = pd.Series({t: s.times[-1] for t, s in self._tanks.items() if len(s.times)}, dtype="int64")
+        ts_all = df["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        # Stays int64: float64 cannot hold ns timestamps exactly
+        seen = df["phycotank_id"].map(last).fillna(_NEVER).to_numpy(dtype=np.int64)
+        fresh = ts_all > seen
+        if not fresh.any():
+            return 0
+        rows = df.loc[fresh, ["timestamp", "phycotank_id", *_SOURCES]].sort_values(["phycotank_id", "timestamp"])
+        ts = rows["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        values = rows[_SOURCES].to_numpy(dtype=np.float64)
+        codes, tanks = pd.factorize(rows["phycotank_id"], sort=True)
+        starts = np.r_[0, np.flatnonzero(np.diff(codes)) + 1]
+        bounds = np.r_[starts, len(codes)]
+
+        # Previous point of every row: the row before it, or the tank's carried last reading
+        known = tanks.isin(last.index)
+        prev_ts = np.r_[ts[:1], ts[:-1]]
+        prev_ts[starts] = last.reindex(tanks).fillna(0).to_numpy(dtype=np.int64)
+        prev_values = np.vstack([values[:1], values[:-1]])
+        prev_values[starts] = [self._carry.get(tank, np.full(len(_SOURCES), np.nan)) for tank in tanks]
+        has_prev = np.ones(len(ts), dtype=bool)
+        has_prev[starts] = known
+
+        dt_h = (ts - prev_ts) / _NS_PER_H
+        valid = has_prev & (dt_h > 0) & (dt_h <= MAX_GAP / pd.Timedelta(hours=1))
+        trapezoid = np.where(valid[:, None], (values + prev_values) / 2 * dt_h[:, None], 0.0)
+        increments = np.nan_to_num(np.where(_INTEGRAL, trapezoid, values))
+
+        self._extend(tanks, bounds, ts, increments)
+        self._carry.update(zip(tanks, values[bounds[1:] - 1]))
+        return len(rows)
+    def summary(self, grid: pd.DatetimeIndex, window: pd.Timedelta = ROLLING_WINDOW) -> KpiSummary:
+        tanks = dict(self._tanks)
+        per_day = window / RATE_UNIT
+        rows = []
+        for tank, series in sorted(tanks.items()):
+            if not len(series.times):
+                continue
+            now = series.times[-1]
+            rates = (series.cum[-1] - series.at(np.array([now - window.value]))[0]) / per_day
+            rows.append({"phycotank_id": tank, "as_of": pd.Timestamp(now),
+                         **dict(zip(_NAMES, series.cum[-1])),
+                         **{f"{n}_rate": r for n, r in zip(_NAMES, rates)}})
+        totals = pd.DataFrame(rows, columns=["phycotank_id", "as_of", *_NAMES, *(f"{n}_rate" for n in _NAMES)])
+
+        g = grid.asi8
+        cum = np.zeros((len(g), len(_NAMES)))
+        back = np.zeros_like(cum)
+        for series in tanks.values():
+            cum += series.at(g)
+            back += series.at(g - window.value)
+        array = pd.DataFrame({
+            "timestamp": grid,
+            **{name: cum[:, i] for i, name in enumerate(_NAMES)},
+            **{f"{name}_rate": (cum[:, i] - back[:, i]) / per_day for i, name in enumerate(_NAMES)},
+        })
+        return KpiSummary(window=window, totals=totals, array=array, tanks=tanks)
+
+    # ---------- Persistence ----------
+    def save(self) -> None:
+        """Checkpoint each tank's running total: (last reading in ns, cumulative values)."""
+        totals = {tank: (int(s.times[-1]), s.cum[-1]) for tank, s in self._tanks.items() if len(s.times)}
+        save_checkpoint(_CHECKPOINT, totals, schema=_SCHEMA)
+
+    def _anchor(self, totals: dict[str, tuple[int, np.ndarray]]) -> None:
+        for tank, (ts, total) in totals.items():
+            series = self._tanks.get(tank)
+            if series is not None:
+                offset = total - series.at(np.array([ts]))[0]
+                self._tanks[tank] = TankKpis(series.times, series.cum + offset)
+
+    @classmethod
+    def restore(cls, df: pd.DataFrame) -> "KpiAccumulator":
+        """Rebuilt from the rollup tiers and the raw rows `df`, anchored to the checkpointed totals."""
+        acc = cls()
+        acc.seed(retention.read_tier("daily"), pd.Timedelta(days=1))
+        acc.seed(retention.read_tier("hourly"), pd.Timedelta(hours=1))
+        acc.update(df)
+        totals = load_checkpoint(_CHECKPOINT, schema=_SCHEMA, check_fingerprint=False)
+        newest = acc.last_ts
+        # Totals ahead of the store mean the store was replaced: start over
+        if isinstance(totals, dict) and newest is not None and all(ts <= newest.value for ts, _ in totals.values()):
+            acc._anchor(totals)
+        return acc
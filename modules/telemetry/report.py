@@ -0,0 +1,217 @@
+# modules/telemetry/report.py
+"""
+Scheduled daily/weekly phycotank array PDF reports.
+
+A background scheduler renders one PDF per completed day and ISO week from the
+aggregation worker's snapshot (per-tank summary statistics plus small-multiple
+charts of the six metrics, drawn with ReportLab graphics) and writes them to
+an archive. Pages only list and serve archived files; nothing is rendered
+inside a user's rerun.
+
+ReportLab is imported inside the rendering functions: every telemetry page
+imports this module for the archive listing, and only the scheduler thread
+ever draws a PDF.
+"""
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import streamlit as st
+
+from modules.telemetry import store
+from modules.telemetry.worker import Snapshot, get_worker
+
+REPORT_DIR = "reports"
+CHECK_INTERVAL_S = 15 * 60
+
+# Most recent completed periods to backfill when the archive is empty
+PERIODS = {"daily": ("D", 14), "weekly": ("W-SUN", 8)}
+
+_LINE = "#42590E"
+_TANK_LINE = "#C9D3B5"
+
+
+def _label(metric: str) -> str:
+    return metric.replace("_", " ").title()
+
+
+def period_key(kind: str, start: pd.Timestamp) -> str:
+    if kind == "weekly":
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    return start.strftime("%Y-%m-%d")
+
+
+def report_path(kind: str, start: pd.Timestamp) -> str:
+    return os.path.join(REPORT_DIR, kind, f"phycotank_{kind}_{period_key(kind, start)}.pdf")
+
+
+def completed_periods(kind: str, min_ts: pd.Timestamp, max_ts: pd.Timestamp,
+                      now: pd.Timestamp) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    """[start, end) periods that overlap the data and have ended by `now` (most recent last)."""
+    freq, keep = PERIODS[kind]
+    periods = pd.period_range(min_ts, max_ts, freq=freq)
+    out = [(p.start_time, p.end_time.ceil("D")) for p in periods]
+    return [(s, e) for s, e in out if e <= now][-keep:]
+
+
+# ---------- Rendering ----------
+def tank_summary(window: pd.DataFrame) -> pd.DataFrame:
+    """Per-tank mean [min–max] for each metric, plus total energy and reading count."""
+    grouped = window.groupby("phycotank_id", sort=True)
+    stats = grouped[store.METRICS].agg(["mean", "min", "max"])
+    out = pd.DataFrame(index=stats.index)
+    out["Readings"] = grouped.size()
+    for metric in store.METRICS:
+        fmt = "{:.3g}" if metric == "mag_field_T" else "{:,.2f}"
+        mean, lo, hi = (stats[(metric, s)] for s in ("mean", "min", "max"))
+        out[_label(metric)] = [
+            f"{fmt.format(m)} [{fmt.format(a)}–{fmt.format(b)}]" if pd.notna(m) else "—"
+            for m, a, b in zip(mean, lo, hi)
+        ]
+    out["Energy Total kWh"] = grouped["energy_consumption_kWh"].sum().round(2)
+    return out.reset_index().rename(columns={"phycotank_id": "Tank"})
+
+
+def _small_multiple(series: pd.DataFrame, per_tank: dict[str, pd.DataFrame], metric: str,
+                    start: pd.Timestamp, width: float, height: float):
+    """Array mean (dark) over individual tanks (light) for one metric, as a ReportLab Drawing."""
+    from reportlab.graphics.charts.lineplots import LinePlot
+    from reportlab.graphics.shapes import Drawing, String
+    from reportlab.lib import colors
+
+    d = Drawing(width, height)
+    d.add(String(4, height - 10, _label(metric), fontName="Helvetica-Bold", fontSize=8))
+
+    def points(frame: pd.DataFrame) -> list[tuple[float, float]]:
+        frame = frame[["timestamp", metric]].dropna()
+        hours = (frame["timestamp"] - start).dt.total_seconds() / 3600.0
+        return list(zip(hours.tolist(), frame[metric].tolist()))
+
+    lines = [points(g) for g in per_tank.values()] + [points(series)]
+    lines = [ln for ln in lines if ln]
+    if not lines:
+        d.add(String(width / 2, height / 2, "No data", fontSize=7, textAnchor="middle"))
+        return d
+
+    plot = LinePlot()
+    plot.x, plot.y = 28, 18
+    plot.width, plot.height = width - 36, height - 34
+    plot.data = lines
+    for i in range(len(lines) - 1):
+        plot.lines[i].strokeColor = colors.HexColor(_TANK_LINE)
+        plot.lines[i].strokeWidth = 0.4
+    plot.lines[len(lines) - 1].strokeColor = colors.HexColor(_LINE)
+    plot.lines[len(lines) - 1].strokeWidth = 1.2
+    plot.xValueAxis.labels.fontSize = 6
+    plot.yValueAxis.labels.fontSize = 6
+    plot.xValueAxis.labelTextFormat = "%dh"
+    plot.yValueAxis.labelTextFormat = "%.2g" if metric == "mag_field_T" else "%.4g"
+    d.add(plot)
+    return d
+
+
+def build_report(window: pd.DataFrame, aggregate: pd.DataFrame, kind: str,
+                 start: pd.Timestamp, end: pd.Timestamp) -> bytes:
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    from modules.pdf import df_to_table_block, render_pdf, title_block
+
+    styles = getSampleStyleSheet()
+    span = f"{start:%d %b %Y}" if kind == "daily" else f"{start:%d %b} – {end - pd.Timedelta(days=1):%d %b %Y}"
+    story = title_block(f"Phycotank Array {kind.title()} Report — {span}", styles)
+    story.append(Paragraph("Nellie Mwyndy Cross PhycoTank Array", styles["Normal"]))
+    story.append(Spacer(1, 8))
+
+    if window.empty:
+        story.append(Paragraph("<i>(No readings in this period)</i>", styles["Normal"]))
+        return render_pdf(story)
+
+    story.append(Paragraph("<b>Per-tank summary</b> — mean [min–max]", styles["Heading3"]))
+    story.append(Spacer(1, 4))
+    table = df_to_table_block(tank_summary(window), max_rows_for_pdf=500)
+    table.setStyle([("FONTSIZE", (0, 0), (-1, -1), 6)])
+    story.append(table)
+    story.append(Spacer(1, 10))
+
+    story.append(Paragraph("<b>Metrics over the period</b> — array mean (dark), tanks (light)", styles["Heading3"]))
+    w, h = 90 * mm, 55 * mm
+    per_tank = dict(tuple(window.groupby("phycotank_id", sort=True)))
+    charts = [_small_multiple(aggregate, per_tank, m, start, w, h) for m in store.METRICS]
+    story.append(Table([charts[i:i + 2] for i in range(0, len(charts), 2)], colWidths=[w, w]))
+    return render_pdf(story)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def generate_missing(snapshot: Snapshot, now: pd.Timestamp | None = None) -> list[str]:
+    """Render every completed period that has no archived PDF yet."""
+    if snapshot.df.empty:
+        return []
+    now = now or pd.Timestamp.now()
+    written = []
+    for kind in PERIODS:
+        for start, end in completed_periods(kind, snapshot.min_ts, snapshot.max_ts, now):
+            path = report_path(kind, start)
+            if os.path.exists(path):
+                continue
+            in_window = (snapshot.df["timestamp"] >= start) & (snapshot.df["timestamp"] < end)
+            agg_window = (snapshot.aggregate["timestamp"] >= start) & (snapshot.aggregate["timestamp"] < end)
+            _write_atomic(path, build_report(snapshot.df[in_window], snapshot.aggregate[agg_window], kind, start, end))
+            written.append(path)
+    return written
+
+
+def list_reports() -> list[dict]:
+    rows = []
+    for kind in PERIODS:
+        folder = os.path.join(REPORT_DIR, kind)
+        if not os.path.isdir(folder):
+            continue
+        for fname in sorted(os.listdir(folder), reverse=True):
+            if fname.endswith(".pdf"):
+                path = os.path.join(folder, fname)
+                rows.append({"kind": kind, "name": fname, "path": path, "size": os.path.getsize(path)})
+    return rows
+
+
+# ---------- Scheduler ----------
+class ReportScheduler(threading.Thread):
+    def __init__(self, interval: float = CHECK_INTERVAL_S):
+        super().__init__(name="report-scheduler", daemon=True)
+        self.interval = interval
+        self.last_run: datetime | None = None
+        self.last_error: Exception | None = None
+
+    def run(self) -> None:
+        worker = get_worker()
+        while True:
+            snapshot = worker.wait_ready()
+            try:
+                for path in generate_missing(snapshot):
+                    print(f"[reports] wrote {path}")
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                print(f"[reports] generation failed: {e}")
+            self.last_run = datetime.now(ZoneInfo("Europe/London"))
+            time.sleep(self.interval)
+
+
+@st.cache_resource
+def get_report_scheduler() -> ReportScheduler:
+    scheduler = ReportScheduler()
+    scheduler.start()
+    return scheduler
@@ -0,0 +1,162 @@
+# modules/telemetry/resample.py
+"""
+Regular-grid resampling and data-quality checks for irregular telemetry.
+
+Every reading is snapped to the nearest slot of one common time grid, and
+readings are reduced per (tank, slot) with numpy bincounts over a flat
+`tank * n_slots + slot` index. That is one pass per metric over all tanks,
+with no per-tank Python loops. Tanks are weighted equally in the array
+aggregate even if one of them reported twice in a slot. Slots with no
+reading stay missing instead of shifting the average.
+
+The same (tank × slot) counts give per-tank coverage, gap runs, and sensors
+that have gone stale.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from modules.telemetry import store
+
+# Slots without a reading before a (tank, metric) counts as stale
+STALE_AFTER_SLOTS = 3
+
+
+@dataclass(frozen=True)
+class GridSummary:
+    freq: pd.Timedelta
+    times: pd.DatetimeIndex
+    aggregate: pd.DataFrame   # timestamp, metrics (mean over reporting tanks), tanks_reporting
+    coverage: pd.DataFrame    # per tank: readings / slots (%) overall and per metric
+    gaps: pd.DataFrame        # phycotank_id, start, end, slots, duration
+    stale: pd.DataFrame       # phycotank_id, metric, last_seen, age
+
+    @property
+    def coverage_pct(self) -> float:
+        """Share of all (tank, slot) cells with at least one reading."""
+        return float(self.coverage["coverage_pct"].mean()) if not self.coverage.empty else 0.0
+
+
+def infer_freq(df: pd.DataFrame) -> pd.Timedelta:
+    """Median interval between consecutive readings of the same tank, rounded to whole seconds."""
+    ordered = df.sort_values(["phycotank_id", "timestamp"])
+    ts = ordered["timestamp"].to_numpy()
+    same_tank = ordered["phycotank_id"].to_numpy()[1:] == ordered["phycotank_id"].to_numpy()[:-1]
+    steps = (ts[1:] - ts[:-1])[same_tank]
+    steps = steps[steps > np.timedelta64(0, "ns")]
+    if len(steps) == 0:
+        return pd.Timedelta(hours=1)
+    return max(pd.Timedelta(np.median(steps)).round("s"), pd.Timedelta(seconds=1))
+
+
+def _grid_codes(df: pd.DataFrame, freq: pd.Timedelta):
+    tank_codes, tanks = pd.factorize(df["phycotank_id"], sort=True)
+    ts = df["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    step = freq.value
+    origin = (ts.min() + step // 2) // step * step  # nearest grid point to the first reading
+    slot = np.rint((ts - origin) / step).astype(np.int64)
+    n_slots = int(slot.max()) + 1
+    times = pd.DatetimeIndex(origin + np.arange(n_slots, dtype=np.int64) * step)
+    return tank_codes, list(tanks), slot, times
+
+
+def _runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(row, start, end_exclusive) of every run of True along axis 1 of a 2-D bool array."""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)  # row-major order pairs each end with its start
+    return rows, starts, ends
+
+
+def resample(df: pd.DataFrame, freq: pd.Timedelta | str | None = None,
+             stale_after: int = STALE_AFTER_SLOTS) -> GridSummary:
+    """Put all tanks on a common grid of `freq` (inferred if omitted) and summarise it."""
+    freq = infer_freq(df) if freq is None else pd.Timedelta(freq)
+    metrics = store.METRICS
+    if df.empty:
+        empty = pd.DataFrame(columns=["timestamp", *metrics, "tanks_reporting"])
+        return GridSummary(freq, pd.DatetimeIndex([]), empty,
+                           pd.DataFrame(columns=["phycotank_id", "coverage_pct"]),
+                           pd.DataFrame(columns=["phycotank_id", "start", "end", "slots", "duration"]),
+                           pd.DataFrame(columns=["phycotank_id", "metric", "last_seen", "age"]))
+
+    tank_codes, tanks, slot, times = _grid_codes(df, freq)
+    n_tanks, n_slots = len(tanks), len(times)
+    cells = n_tanks * n_slots
+    flat = tank_codes * n_slots + slot
+
+    observed = np.bincount(flat, minlength=cells).reshape(n_tanks, n_slots) > 0
+    aggregate = {"timestamp": times}
+    coverage = {"phycotank_id": tanks, "coverage_pct": 100.0 * observed.mean(axis=1)}
+    tank_names = np.asarray(tanks, dtype=object)
+    stale_parts = []
+    for metric in metrics:
+        values = df[metric].to_numpy(dtype=np.float64)
+        ok = ~np.isnan(values)
+        # float64 throughout: bincount returns int64 when no weights survive (an all-NaN metric)
+        sums = np.bincount(flat[ok], weights=values[ok], minlength=cells).astype(np.float64).reshape(n_tanks, n_slots)
+        counts = np.bincount(flat[ok], minlength=cells).reshape(n_tanks, n_slots)
+        has = counts > 0
+        tank_means = np.divide(sums, counts, out=np.zeros((n_tanks, n_slots)), where=has)
+        reporting = has.sum(axis=0)
+        aggregate[metric] = np.divide(tank_means.sum(axis=0), reporting,
+                                      out=np.full(n_slots, np.nan), where=reporting > 0)
+        coverage[f"{metric}_pct"] = 100.0 * has.mean(axis=1)
+
+        # Last slot with a reading, per tank (-1 if never)
+        last = np.where(has.any(axis=1), n_slots - 1 - np.argmax(has[:, ::-1], axis=1), -1)
+        lagging = np.nonzero(n_slots - 1 - last >= stale_after)[0]
+        if len(lagging):
+            seen = last[lagging]
+            stale_parts.append(pd.DataFrame({
+                "phycotank_id": tank_names[lagging],
+                "metric": metric,
+                "last_seen": pd.DatetimeIndex(np.where(seen >= 0, times.asi8[seen], np.iinfo(np.int64).min)),
+            }))
+    aggregate["tanks_reporting"] = observed.sum(axis=0)
+
+    rows, starts, ends = _runs(~observed)
+    gaps = pd.DataFrame({
+        "phycotank_id": tank_names[rows],
+        "start": times[starts] if len(starts) else pd.DatetimeIndex([]),
+        "end": times[ends - 1] if len(ends) else pd.DatetimeIndex([]),
+        "slots": ends - starts,
+    })
+    gaps["duration"] = gaps["slots"] * freq
+
+    stale = (pd.concat(stale_parts, ignore_index=True) if stale_parts
+             else pd.DataFrame({"phycotank_id": [], "metric": [], "last_seen": pd.DatetimeIndex([])}))
+    stale["age"] = times[-1] - stale["last_seen"]
+
+    return GridSummary(
+        freq=freq,
+        times=times,
+        aggregate=pd.DataFrame(aggregate),
+        coverage=pd.DataFrame(coverage).sort_values("coverage_pct", ignore_index=True),
+        gaps=gaps.sort_values(["slots", "phycotank_id"], ascending=[False, True], ignore_index=True),
+        stale=stale.sort_values(["phycotank_id", "metric"], ignore_index=True),
+    )
+
+
+def grid_frame(df: pd.DataFrame, freq: pd.Timedelta | str | None = None) -> pd.DataFrame:
+    """Long per-tank grid (every tank × slot, NaN where missing), for charts and exports."""
+    freq = infer_freq(df) if freq is None else pd.Timedelta(freq)
+    if df.empty:
+        return pd.DataFrame(columns=store.COLUMNS)
+    tank_codes, tanks, slot, times = _grid_codes(df, freq)
+    n_tanks, n_slots = len(tanks), len(times)
+    flat = tank_codes * n_slots + slot
+    out = {
+        "timestamp": np.tile(times.to_numpy(), n_tanks),
+        "phycotank_id": np.repeat(np.asarray(tanks, dtype=object), n_slots),
+    }
+    for metric in store.METRICS:
+        values = df[metric].to_numpy(dtype=np.float64)
+        ok = ~np.isnan(values)
+        sums = np.bincount(flat[ok], weights=values[ok], minlength=n_tanks * n_slots).astype(np.float64)
+        counts = np.bincount(flat[ok], minlength=n_tanks * n_slots)
+        out[metric] = np.divide(sums, counts, out=np.full(len(sums), np.nan), where=counts > 0)
+    return pd.DataFrame(out).astype({"phycotank_id": "string"})
@@ -0,0 +1,464 @@
+# modules/telemetry/retention.py
+"""
+Tiered retention for the telemetry store.
+
+Tiers, newest to oldest:
+    raw     the store CSV, full resolution, for the last RAW_RETENTION_DAYS
+    hourly  per tank and hour: mean/min/max/count of every metric, for the
+            HOURLY_RETENTION_DAYS before that
+    daily   the same statistics per tank and day, kept forever
+
+Windows are measured back from the newest reading in the store, not the wall
+clock, so a paused feed (or the bundled sample data) is never compacted away
+just because time passed.
+
+Compaction first checks the oldest raw row and hourly bucket (one line each)
+and returns if nothing has expired. Otherwise it streams the raw CSV once,
+rolls expired rows up into the hourly tier, and rolls expired hourly rows into
+the daily tier. Buckets that already
+exist (late data, or a re-run) are merged, never duplicated. Each tier stays
+time-disjoint from the others. All files are rewritten under
+store.write_lock(), so ingest commits wait for compaction instead of being
+lost. The new files are swapped in through a small redo journal, so a crash
+never leaves rows in both tiers.
+
+query() reads across tiers transparently: a request for a year of data at
+daily resolution reads the daily and hourly rollups plus only the recent raw
+rows.
+
+CLI:
+    python -m modules.telemetry.retention --compact
+    python -m modules.telemetry.retention --stats
+"""
+import argparse
+import json
+import os
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules import cache
+from modules.telemetry import store
+
+ROLLUP_DIR = "data/telemetry"
+RAW_RETENTION_DAYS = 30
+HOURLY_RETENTION_DAYS = 365
+COMPACT_INTERVAL_S = 60 * 60
+
+# Tier name -> (bucket frequency, file)
+TIERS = {
+    "hourly": ("h", os.path.join(ROLLUP_DIR, "rollup_hourly.csv")),
+    "daily": ("D", os.path.join(ROLLUP_DIR, "rollup_daily.csv")),
+}
+RESOLUTIONS = ("raw", "hourly", "daily")
+
+STATS = ("mean", "min", "max", "count")
+ROLLUP_COLUMNS = ["timestamp", "phycotank_id", *(f"{m}_{s}" for m in store.METRICS for s in STATS)]
+ROLLUP_DTYPES = {
+    "phycotank_id": "string",
+    **{f"{m}_{s}": ("int64" if s == "count" else "float64") for m in store.METRICS for s in STATS},
+}
+
+_JOURNAL = os.path.join(ROLLUP_DIR, "compaction.journal")
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    raw_days: int = RAW_RETENTION_DAYS
+    hourly_days: int = HOURLY_RETENTION_DAYS
+
+    def cutoffs(self, newest: pd.Timestamp) -> tuple[pd.Timestamp, pd.Timestamp]:
+        """(raw_cutoff, hourly_cutoff): rows before these move down a tier. Whole buckets only."""
+        raw_cutoff = (newest - pd.Timedelta(days=self.raw_days)).floor("h")
+        hourly_cutoff = (raw_cutoff - pd.Timedelta(days=self.hourly_days)).floor("D")
+        return raw_cutoff, hourly_cutoff
+
+
+@dataclass
+class CompactionStats:
+    raw_rows_compacted: int = 0
+    hourly_rows_compacted: int = 0
+    raw_rows_kept: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.raw_rows_compacted or self.hourly_rows_compacted)
+
+    def summary(self) -> str:
+        if not self.changed:
+            return "nothing expired"
+        return (f"raw→hourly {self.raw_rows_compacted:,} rows, hourly→daily {self.hourly_rows_compacted:,} rows, "
+                f"{self.raw_rows_kept:,} raw rows kept")
+
+
+# ---------- Rollup arithmetic ----------
+def as_rollup(raw: pd.DataFrame) -> pd.DataFrame:
+    """Raw readings in rollup form (each reading is a bucket of one)."""
+    out = {"timestamp": raw["timestamp"], "phycotank_id": raw["phycotank_id"]}
+    for m in store.METRICS:
+        v = raw[m]
+        out[f"{m}_mean"] = v
+        out[f"{m}_min"] = v
+        out[f"{m}_max"] = v
+        out[f"{m}_count"] = v.notna().astype("int64")
+    return pd.DataFrame(out)
+
+
+def combine(rollups: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """Merge rollup rows into `freq` buckets per tank: count-weighted mean, min of mins, max of maxes."""
+    if rollups.empty:
+        return pd.DataFrame({c: pd.Series(dtype=ROLLUP_DTYPES.get(c, "datetime64[ns]")) for c in ROLLUP_COLUMNS})
+    keyed = rollups.assign(timestamp=rollups["timestamp"].dt.floor(freq))
+    spec = {}
+    for m in store.METRICS:
+        keyed[f"{m}_sum"] = keyed[f"{m}_mean"].fillna(0.0) * keyed[f"{m}_count"]
+        spec.update({f"{m}_sum": "sum", f"{m}_min": "min", f"{m}_max": "max", f"{m}_count": "sum"})
+    out = keyed.groupby(["timestamp", "phycotank_id"], as_index=False, sort=True).agg(spec)
+    for m in store.METRICS:
+        count = out[f"{m}_count"]
+        out[f"{m}_mean"] = np.where(count > 0, out[f"{m}_sum"] / count.where(count > 0, 1), np.nan)
+    return out[ROLLUP_COLUMNS].astype(ROLLUP_DTYPES)
+
+
+def to_readings(rollups: pd.DataFrame) -> pd.DataFrame:
+    """Rollups in the store's column layout (bucket means as values)."""
+    out = rollups[["timestamp", "phycotank_id"]].copy()
+    for m in store.METRICS:
+        out[m] = rollups[f"{m}_mean"]
+    return out
+
+
+# ---------- Tier files ----------
+def read_tier(tier: str, tanks: set[str] | None = None, start=None, end=None) -> pd.DataFrame:
+    path = TIERS[tier][1]
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return combine(pd.DataFrame(), TIERS[tier][0])
+    df = pd.read_csv(path, usecols=ROLLUP_COLUMNS, dtype=ROLLUP_DTYPES, parse_dates=["timestamp"])
+    mask = pd.Series(True, index=df.index)
+    if tanks:
+        mask &= df["phycotank_id"].isin(tanks)
+    if start is not None:
+        mask &= df["timestamp"] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df["timestamp"] <= pd.Timestamp(end)
+    return df if mask.all() else df[mask].reset_index(drop=True)
+
+
+def _write_tmp(df: pd.DataFrame, dest: str) -> str:
+    tmp = dest + ".compact"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        df.to_csv(f, index=False, date_format=store.TIMESTAMP_FORMAT, lineterminator="\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp
+
+
+def _commit(replacements: dict[str, str]) -> None:
+    """Swap every tmp -> dest as one unit: journal first, so a crash mid-way is redone on next run."""
+    tmp_journal = _JOURNAL + ".tmp"
+    with open(tmp_journal, "w") as f:
+        json.dump(replacements, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_journal, _JOURNAL)
+    _redo_journal()
+
+
+def _redo_journal() -> None:
+    try:
+        with open(_JOURNAL) as f:
+            replacements = json.load(f)
+    except FileNotFoundError:
+        return
+    for tmp, dest in replacements.items():
+        if os.path.exists(tmp):
+            os.replace(tmp, dest)
+    os.remove(_JOURNAL)
+
+
+# ---------- Compaction ----------
+def _first_line_ts(path: str) -> pd.Timestamp | None:
+    """Timestamp of the first data row (the oldest: files are written in time order)."""
+    with open(path, "rb") as f:
+        f.readline()  # header
+        line = f.readline().strip()
+    return pd.Timestamp(line.split(b",", 1)[0].decode()) if line else None
+
+
+def _raw_span(path: str) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+    """(first, last) raw row timestamps from the first and last lines only. Caller holds write_lock()."""
+    first = _first_line_ts(path)
+    if first is None:
+        return None
+    with open(path, "rb") as f:
+        f.seek(max(0, os.fstat(f.fileno()).st_size - 4096))
+        last = f.read().rstrip(b"\n").rsplit(b"\n", 1)[-1]
+    return first, pd.Timestamp(last.split(b",", 1)[0].decode())
+
+
+def _nothing_expired(path: str, policy: RetentionPolicy) -> bool:
+    """
+    Cheap pre-check: the oldest raw row and oldest hourly bucket are inside
+    their windows. Late rows appended out of order are picked up once the
+    oldest row expires too.
+    """
+    span = _raw_span(path)
+    if span is None:
+        return True
+    raw_cutoff, hourly_cutoff = policy.cutoffs(span[1])
+    if span[0] < raw_cutoff:
+        return False
+    hourly_path = TIERS["hourly"][1]
+    oldest_hourly = _first_line_ts(hourly_path) if os.path.exists(hourly_path) else None
+    return oldest_hourly is None or oldest_hourly >= hourly_cutoff
+
+
+def _newest_raw(path: str) -> pd.Timestamp | None:
+    newest = None
+    reader = pd.read_csv(path, usecols=["timestamp"], parse_dates=["timestamp"], chunksize=store.DEFAULT_CHUNK_ROWS)
+    with reader:
+        for chunk in reader:
+            if not chunk.empty:
+                m = chunk["timestamp"].max()
+                newest = m if newest is None or m > newest else newest
+    return newest
+
+
+def compact(policy: RetentionPolicy = RetentionPolicy(), path: str = store.TELEMETRY_CSV,
+            dry_run: bool = False) -> CompactionStats:
+    """Move expired raw rows into hourly rollups and expired hourly rollups into daily ones."""
+    stats = CompactionStats()
+    os.makedirs(ROLLUP_DIR, exist_ok=True)
+    with store.write_lock(path):
+        _redo_journal()
+        if not os.path.exists(path):
+            return stats
+        if _nothing_expired(path, policy):
+            # Reads two lines, so the hourly pass holds the lock only when rows actually move
+            return stats
+        newest = _newest_raw(path)
+        if newest is None:
+            return stats
+        raw_cutoff, hourly_cutoff = policy.cutoffs(newest)
+
+        # Single streaming pass: keep recent rows, roll expired ones up per chunk
+        raw_tmp = path + ".compact"
+        expired_parts = []
+        with open(raw_tmp, "w", newline="", encoding="utf-8") as out:
+            out.write(",".join(store.COLUMNS) + "\n")
+            # Under the lock: read to EOF, so a last row without a newline is kept, not dropped
+            for chunk in store.iter_chunks(path=path, complete_only=False):
+                old = chunk["timestamp"] < raw_cutoff
+                if old.any():
+                    expired_parts.append(combine(as_rollup(chunk[old]), TIERS["hourly"][0]))
+                    stats.raw_rows_compacted += int(old.sum())
+                keep = chunk[~old]
+                stats.raw_rows_kept += len(keep)
+                keep.to_csv(out, header=False, index=False, date_format=store.TIMESTAMP_FORMAT, lineterminator="\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+        hourly = read_tier("hourly")
+        if expired_parts:
+            hourly = combine(pd.concat([hourly, *expired_parts], ignore_index=True), TIERS["hourly"][0])
+        old_hourly = hourly["timestamp"] < hourly_cutoff
+        stats.hourly_rows_compacted = int(old_hourly.sum())
+
+        if dry_run or not stats.changed:
+            os.remove(raw_tmp)
+            return stats
+
+        replacements = {raw_tmp: path, _write_tmp(hourly[~old_hourly], TIERS["hourly"][1]): TIERS["hourly"][1]}
+        if stats.hourly_rows_compacted:
+            daily = combine(pd.concat([read_tier("daily"), hourly[old_hourly]], ignore_index=True), TIERS["daily"][0])
+            replacements[_write_tmp(daily, TIERS["daily"][1])] = TIERS["daily"][1]
+        _commit(replacements)
+    return stats
+
+
+# ---------- Cross-tier queries ----------
+def auto_resolution(start, end) -> str:
+    """Coarsest resolution that still gives a readable chart for the span."""
+    if start is None or end is None:
+        return "daily"
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    if span > pd.Timedelta(days=90):
+        return "daily"
+    if span > pd.Timedelta(days=3):
+        return "hourly"
+    return "raw"
+
+
+def query(tanks: Iterable[str] | None = None, start=None, end=None, resolution: str | None = None,
+          with_stats: bool = False, path: str = store.TELEMETRY_CSV) -> pd.DataFrame:
+    """
+    Telemetry for [start, end] across all tiers at `resolution` ("raw", "hourly",
+    "daily"; auto-chosen from the span if None). Periods that only exist in a
+    coarser tier come back at that tier's resolution. Returns the store's
+    columns, or the rollup columns (mean/min/max/count) with `with_stats`.
+    """
+    resolution = resolution or auto_resolution(start, end)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {RESOLUTIONS}")
+    tank_set = set(tanks) if tanks else None
+
+    # Tiers are time-disjoint, so combining them never double counts
+    parts = [read_tier("daily", tank_set, start, end), read_tier("hourly", tank_set, start, end)]
+    if resolution == "raw" and not with_stats:
+        raw = store.load(tank_set, start, end, path=path)
+        older = pd.concat(parts, ignore_index=True)
+        frames = [to_readings(older), raw] if not older.empty else [raw]
+        return pd.concat(frames, ignore_index=True).sort_values(["phycotank_id", "timestamp"], ignore_index=True)
+
+    freq = {"raw": None, "hourly": "h", "daily": "D"}[resolution]
+    raw_rollups = [combine(as_rollup(c), freq or "s") for c in store.iter_chunks(tank_set, start, end, path=path)]
+    merged = pd.concat([*parts, *raw_rollups], ignore_index=True)
+    # Buckets never get finer than the tier they came from
+    result = combine(merged, freq) if freq else merged.sort_values(["timestamp", "phycotank_id"], ignore_index=True)
+    result = result.sort_values(["phycotank_id", "timestamp"], ignore_index=True)
+    return result if with_stats else to_readings(result)
+
+
+def iter_query(tanks: Iterable[str] | None = None, start=None, end=None, resolution: str = "raw",
+               chunk_rows: int = store.DEFAULT_CHUNK_ROWS, path: str = store.TELEMETRY_CSV):
+    """
+    query() as a stream of store-layout chunks, for exports. At "raw" only the
+    (bounded) rollup tiers are held in memory; the raw tier is streamed.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {RESOLUTIONS}")
+    tank_set = set(tanks) if tanks else None
+    if resolution == "raw":
+        older = pd.concat([read_tier("daily", tank_set, start, end), read_tier("hourly", tank_set, start, end)],
+                          ignore_index=True)
+        rest = store.iter_chunks(tank_set, start, end, chunk_rows=chunk_rows, path=path)
+    else:
+        older = query(tank_set, start, end, resolution=resolution, with_stats=True, path=path)
+        rest = ()
+    older = to_readings(older)
+    for i in range(0, len(older), chunk_rows):
+        yield older.iloc[i:i + chunk_rows].reset_index(drop=True)
+    yield from rest
+
+
+def earliest() -> pd.Timestamp | None:
+    """Oldest bucket in the rollup tiers, or None if nothing has been compacted yet.
+    Rollup files are time-sorted, so this reads one row per file."""
+    firsts = []
+    for _, tier_path in TIERS.values():
+        if os.path.exists(tier_path) and os.path.getsize(tier_path):
+            head = pd.read_csv(tier_path, usecols=["timestamp"], parse_dates=["timestamp"], nrows=1)
+            firsts += head["timestamp"].tolist()
+    return min(firsts) if firsts else None
+
+
+def rollups_fingerprint() -> tuple:
+    """Changes only when compaction rewrites a rollup tier (not on every ingest commit)."""
+    return tuple(store.fingerprint(tier_path) for _, tier_path in TIERS.values())
+
+
+_histories = cache.register("telemetry-history", ttl=3600)
+
+
+@cache.cached("telemetry-daily-rollups")
+def _daily_rollups(fingerprint: tuple) -> pd.DataFrame:
+    # All tanks at once, one entry per compaction; tanks are sliced out per call
+    merged = pd.concat([read_tier("daily"), read_tier("hourly")], ignore_index=True)
+    return combine(merged, "D").sort_values(["phycotank_id", "timestamp"], ignore_index=True)
+
+
+def history(tank: str, recent: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Whole daily history of one tank (mean/min/max/count per day). Compacted
+    days come from a cache that only changes per compaction; the raw tail is
+    taken from `recent` (the tank's rows in the live snapshot) rather than
+    re-reading the store.
+    """
+    fingerprint = rollups_fingerprint()
+    has_recent = recent is not None and not recent.empty
+    tail_key = (len(recent), recent["timestamp"].iloc[-1]) if has_recent else None
+
+    def build() -> pd.DataFrame:
+        rollups = _daily_rollups(fingerprint)
+        ids = rollups["phycotank_id"]
+        parts = [rollups.iloc[ids.searchsorted(tank, side="left"):ids.searchsorted(tank, side="right")]]
+        if has_recent:
+            parts.append(as_rollup(recent))
+        # The boundary day can be split between the hourly tier and raw; combine merges it
+        return combine(pd.concat(parts, ignore_index=True), "D")
+
+    return _histories.get_or_set((tank, fingerprint, tail_key), build)
+
+
+def tier_stats(path: str = store.TELEMETRY_CSV) -> pd.DataFrame:
+    rows = []
+    raw = store.load(path=path) if os.path.exists(path) else pd.DataFrame(columns=store.COLUMNS)
+    rows.append({"tier": "raw", "rows": len(raw), "from": raw["timestamp"].min(), "to": raw["timestamp"].max(),
+                 "bytes": os.path.getsize(path) if os.path.exists(path) else 0})
+    for tier, (_, tier_path) in TIERS.items():
+        df = read_tier(tier)
+        rows.append({"tier": tier, "rows": len(df), "from": df["timestamp"].min(), "to": df["timestamp"].max(),
+                     "bytes": os.path.getsize(tier_path) if os.path.exists(tier_path) else 0})
+    return pd.DataFrame(rows)
+
+
+# ---------- Background compaction ----------
+class Compactor(threading.Thread):
+    def __init__(self, policy: RetentionPolicy = RetentionPolicy(), interval: float = COMPACT_INTERVAL_S):
+        super().__init__(name="telemetry-compactor", daemon=True)
+        self.policy = policy
+        self.interval = interval
+        self._wake = threading.Event()
+        self._last_fingerprint: tuple[int, int] | None = None
+        self.last_stats: CompactionStats | None = None
+        self.last_error: Exception | None = None
+
+    def run(self) -> None:
+        while True:
+            fingerprint = store.fingerprint()
+            if fingerprint != self._last_fingerprint:  # nothing new since the last pass
+                try:
+                    self.last_stats = compact(self.policy)
+                    if self.last_stats.changed:
+                        print(f"[retention] {self.last_stats.summary()}")
+                    self._last_fingerprint = store.fingerprint()
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = e
+                    print(f"[retention] compaction failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def trigger(self) -> None:
+        self._wake.set()
+
+
+@st.cache_resource
+def get_compactor() -> Compactor:
+    compactor = Compactor()
+    compactor.start()
+    return compactor
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Telemetry retention and compaction.")
+    parser.add_argument("--compact", action="store_true", help="Run one compaction pass")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be compacted")
+    parser.add_argument("--stats", action="store_true", help="Show rows and size per tier")
+    parser.add_argument("--raw-days", type=int, default=RAW_RETENTION_DAYS)
+    parser.add_argument("--hourly-days", type=int, default=HOURLY_RETENTION_DAYS)
+    args = parser.parse_args(argv)
+
+    if args.compact or args.dry_run:
+        stats = compact(RetentionPolicy(args.raw_days, args.hourly_days), dry_run=args.dry_run)
+        print(("Would compact: " if args.dry_run else "Compacted: ") + stats.summary())
+    if args.stats or not (args.compact or args.dry_run):
+        print(tier_stats().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
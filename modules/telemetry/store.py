@@ -0,0 +1,182 @@
+# modules/telemetry/store.py
+"""
+Telemetry storage layer for the Mwyndy Cross phycotank array.
+
+Readings live in a single long CSV (one row per tank per timestamp). Everything
+that reads telemetry should go through here so that the file location, column
+dtypes and chunked access are defined in one place.
+
+Writers append under write_lock(); readers never take it. Instead they only
+read up to the last newline in the file, so a row that is still being
+appended is picked up on the next read rather than parsed half-written.
+Callers that hold write_lock() read to the end (complete_only=False): no
+append can be in progress, and a last line without a newline is a real row.
+"""
+import fcntl
+import io
+import os
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+import pandas as pd
+
+# CSV must be in the repo root (adjust path if you moved it)
+TELEMETRY_CSV = "phycotank_array_dummy_data_filled.csv"
+
+METRICS = [
+    "pH",
+    "temperature_C",
+    "flow_rate_lph",
+    "energy_consumption_kWh",
+    "lux",
+    "mag_field_T",
+]
+COLUMNS = ["timestamp", "phycotank_id", *METRICS]
+DTYPES = {"phycotank_id": "string", **{m: "float64" for m in METRICS}}
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Rows per chunk when streaming; roughly a few MB of parsed data per chunk.
+DEFAULT_CHUNK_ROWS = 50_000
+
+_TAIL_BLOCK = 64 * 1024
+
+
+class _Bounded(io.RawIOBase):
+    """Read-only view of the first `limit` bytes of a binary file."""
+
+    def __init__(self, f, limit: int):
+        self._f, self._left = f, limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = self._f.readinto(memoryview(b)[: min(len(b), self._left)])
+        self._left -= n
+        return n
+
+
+def _complete_size(f) -> int:
+    """Bytes up to and including the last newline (0 if there is none)."""
+    end = os.fstat(f.fileno()).st_size
+    while end > 0:
+        start = max(0, end - _TAIL_BLOCK)
+        f.seek(start)
+        i = f.read(end - start).rfind(b"\n")
+        if i >= 0:
+            f.seek(0)
+            return start + i + 1
+        end = start
+    f.seek(0)
+    return 0
+
+
+def _filter(
+    chunk: pd.DataFrame,
+    tanks: set[str] | None,
+    start: pd.Timestamp | None,
+    end: pd.Timestamp | None,
+) -> pd.DataFrame:
+    mask = pd.Series(True, index=chunk.index)
+    if tanks:
+        mask &= chunk["phycotank_id"].isin(tanks)
+    if start is not None:
+        mask &= chunk["timestamp"] >= start
+    if end is not None:
+        mask &= chunk["timestamp"] <= end
+    return chunk if mask.all() else chunk[mask]
+
+
+def iter_chunks(
+    tanks: Iterable[str] | None = None,
+    start=None,
+    end=None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    path: str = TELEMETRY_CSV,
+    complete_only: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield telemetry in row chunks, filtered to the given tanks and [start, end].
+    Only one chunk is ever held in memory, so this is safe for full-history scans.
+    Pass complete_only=False only while holding write_lock().
+    """
+    tank_set = set(tanks) if tanks else None
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    with open(path, "rb") as f:
+        # An append in progress may have left a partial last line: stop before it
+        size = _complete_size(f) if complete_only else os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        reader = pd.read_csv(
+            io.BufferedReader(_Bounded(f, size)),
+            usecols=COLUMNS,
+            dtype=DTYPES,
+            parse_dates=["timestamp"],
+            chunksize=chunk_rows,
+        )
+        with reader:
+            for chunk in reader:
+                chunk = _filter(chunk, tank_set, start, end)
+                if not chunk.empty:
+                    yield chunk
+
+
+def load(tanks: Iterable[str] | None = None, start=None, end=None, path: str = TELEMETRY_CSV,
+         complete_only: bool = True) -> pd.DataFrame:
+    """Load the (filtered) telemetry into a single frame. See iter_chunks() for `complete_only`."""
+    chunks = list(iter_chunks(tanks, start, end, path=path, complete_only=complete_only))
+    if not chunks:
+        return pd.DataFrame({c: pd.Series(dtype=DTYPES.get(c, "datetime64[ns]")) for c in COLUMNS})
+    return pd.concat(chunks, ignore_index=True)
+
+
+def fingerprint(path: str = TELEMETRY_CSV) -> tuple[int, int]:
+    """Cheap change marker for cache keys: (mtime_ns, size). (0, 0) if missing."""
+    try:
+        st_ = os.stat(path)
+    except FileNotFoundError:
+        return (0, 0)
+    return (st_.st_mtime_ns, st_.st_size)
+
+
+@contextmanager
+def write_lock(path: str = TELEMETRY_CSV):
+    """
+    Exclusive cross-process lock for writers. Readers never take it, so
+    dashboard reads are not blocked by ingest commits; iter_chunks() stops at
+    the last complete line instead (unless the caller holds this lock).
+    """
+    with open(path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def append(df: pd.DataFrame, path: str = TELEMETRY_CSV) -> int:
+    """
+    Append rows to the store in a single write and fsync. Caller should hold
+    write_lock(). Returns the number of bytes written.
+    """
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    payload = df.reindex(columns=COLUMNS).to_csv(
+        index=False, header=new_file, date_format=TIMESTAMP_FORMAT, lineterminator="\n"
+    ).encode("utf-8")
+    if not new_file:
+        # Hand-edited files sometimes lose the trailing newline
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                payload = b"\n" + payload
+
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, payload)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return len(payload)
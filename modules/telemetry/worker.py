@@ -0,0 +1,238 @@
+# modules/telemetry/worker.py
+"""
+Background aggregation worker shared by every Streamlit session.
+
+One worker thread per server owns loading, rollups and alert evaluation. Each
+time the telemetry store changes it builds a new immutable Snapshot and swaps
+it in; page scripts only read the latest snapshot, so per-session cost does
+not depend on the size of the data.
+
+The latest snapshot is also checkpointed to disk, at most every
+CHECKPOINT_INTERVAL_S (sustained ingest rebuilds every few seconds, and each
+checkpoint hashes the CSV and pickles the snapshot) and once more at exit. On
+server start the checkpoint is reloaded if the store content is unchanged, so
+the first visitor after a redeploy does not pay for the CSV parse and rollups.
+"""
+import atexit
+import dataclasses
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import streamlit as st
+
+from modules import cache
+from modules.checkpoint import content_digest, load_checkpoint, save_checkpoint
+from modules.telemetry import store
+from modules.telemetry.kpi import KpiAccumulator, KpiSummary
+from modules.telemetry.resample import GridSummary, resample
+from modules.telemetry.retention import get_compactor
+
+# Safety-net poll; changes are normally pushed via update_now() by the file watcher
+POLL_INTERVAL_S = 30.0
+CHECKPOINT_INTERVAL_S = 5 * 60
+
+_SNAPSHOT_CHECKPOINT = "telemetry-snapshot"
+# Bump when Snapshot fields or rollup semantics change
+_SNAPSHOT_SCHEMA = 3
+
+# The published snapshot stays resident; registered so it counts against the budget
+_resident = cache.register("telemetry-snapshot", evictable=False)
+
+# Latest reading outside (low, high) raises an alert; None = unbounded
+ALERT_LIMITS = {
+    "pH": (6.5, 8.5),
+    "temperature_C": (15.0, 30.0),
+    "flow_rate_lph": (50.0, None),
+}
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Ready-to-render results. Frames are shared between sessions: treat as read-only."""
+    version: int
+    fingerprint: tuple[int, int]
+    built_at: datetime
+    df: pd.DataFrame
+    tanks: list[str]
+    aggregate: pd.DataFrame  # array mean per grid slot (see resample.py), with tanks_reporting
+    by_tank: dict[str, pd.DataFrame] = field(repr=False)
+    latest: pd.DataFrame = field(repr=False)
+    alerts: pd.DataFrame = field(repr=False)
+    quality: GridSummary = field(repr=False)
+    kpis: KpiSummary = field(repr=False)
+
+    @property
+    def min_ts(self) -> pd.Timestamp:
+        return self.df["timestamp"].min()
+
+    @property
+    def max_ts(self) -> pd.Timestamp:
+        return self.df["timestamp"].max()
+
+
+def evaluate_alerts(latest: pd.DataFrame) -> pd.DataFrame:
+    """One row per (tank, metric) whose latest reading is outside ALERT_LIMITS."""
+    frames = []
+    for metric, (low, high) in ALERT_LIMITS.items():
+        values = latest[metric]
+        mask = pd.Series(False, index=latest.index)
+        if low is not None:
+            mask |= values < low
+        if high is not None:
+            mask |= values > high
+        if mask.any():
+            hit = latest.loc[mask, ["phycotank_id", "timestamp"]].copy()
+            hit["metric"] = metric
+            hit["value"] = values[mask]
+            hit["limits"] = f"{low if low is not None else '−∞'} – {high if high is not None else '∞'}"
+            frames.append(hit)
+    if not frames:
+        return pd.DataFrame(columns=["phycotank_id", "timestamp", "metric", "value", "limits"])
+    return pd.concat(frames, ignore_index=True).sort_values(["phycotank_id", "metric"], ignore_index=True)
+
+
+def build_snapshot(df: pd.DataFrame, version: int, fingerprint: tuple[int, int],
+                   kpis: KpiAccumulator) -> Snapshot:
+    df = df.sort_values(["phycotank_id", "timestamp"], ignore_index=True)
+    # Common-grid resampling: exact-timestamp groupby misaligns jittered or missing readings
+    quality = resample(df)
+    by_tank = {tank: g.reset_index(drop=True) for tank, g in df.groupby("phycotank_id", sort=True)}
+    latest = df.groupby("phycotank_id", as_index=False).tail(1).reset_index(drop=True)
+    return Snapshot(
+        version=version,
+        fingerprint=fingerprint,
+        built_at=datetime.now(ZoneInfo("Europe/London")),
+        df=df,
+        tanks=sorted(by_tank),
+        aggregate=quality.aggregate,
+        by_tank=by_tank,
+        latest=latest,
+        alerts=evaluate_alerts(latest),
+        quality=quality,
+        kpis=kpis.summary(quality.times),
+    )
+
+
+class AggregationWorker(threading.Thread):
+    def __init__(self, poll_interval: float = POLL_INTERVAL_S, checkpoint_interval: float = CHECKPOINT_INTERVAL_S):
+        super().__init__(name="telemetry-aggregator", daemon=True)
+        self.poll_interval = poll_interval
+        self.checkpoint_interval = checkpoint_interval
+        self._checkpointed: tuple[Snapshot, float] | None = None  # (snapshot, monotonic time saved)
+        self._snapshot: Snapshot | None = None
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._update_lock = threading.Lock()
+        self._kpis: KpiAccumulator | None = None  # running totals; only touched under _update_lock
+        self.last_error: Exception | None = None
+
+    @property
+    def snapshot(self) -> Snapshot | None:
+        return self._snapshot
+
+    def wait_ready(self, timeout: float | None = None) -> Snapshot | None:
+        self._ready.wait(timeout)
+        return self._snapshot
+
+    def refresh(self) -> None:
+        """Ask for an immediate rebuild check instead of waiting for the next poll."""
+        self._wake.set()
+
+    def update_now(self) -> Snapshot | None:
+        """Rebuild synchronously (on the caller's thread) if the store changed."""
+        self._update()
+        return self._snapshot
+
+    def _publish(self, snapshot: Snapshot) -> None:
+        # Plain attribute assignment is atomic, so readers never see a half-built snapshot
+        self._snapshot = snapshot
+        self._ready.set()
+        _resident.set("current", snapshot)
+
+    def _warm_start(self, fingerprint: tuple[int, int]) -> bool:
+        digest = content_digest(store.TELEMETRY_CSV)
+        cached = load_checkpoint(_SNAPSHOT_CHECKPOINT, fingerprint=digest, schema=_SNAPSHOT_SCHEMA)
+        if cached is None:
+            return False
+        self._publish(dataclasses.replace(cached, fingerprint=fingerprint))
+        self._checkpointed = (self._snapshot, time.monotonic())  # already on disk
+        return True
+
+    def _update(self) -> None:
+        with self._update_lock:
+            self._update_locked()
+            self._checkpoint()
+
+    def _checkpoint(self, force: bool = False) -> None:
+        """Save the published snapshot if it is unsaved and (unless forced) the interval has passed."""
+        snapshot, saved = self._snapshot, self._checkpointed
+        if snapshot is None or (saved is not None and saved[0] is snapshot):
+            return
+        now = time.monotonic()
+        if not force and saved is not None and now - saved[1] < self.checkpoint_interval:
+            return  # no digest either: it is the expensive part
+        digest = content_digest(store.TELEMETRY_CSV)
+        if snapshot.fingerprint == store.fingerprint():  # don't checkpoint under a digest of newer data
+            save_checkpoint(_SNAPSHOT_CHECKPOINT, snapshot, fingerprint=digest, schema=_SNAPSHOT_SCHEMA)
+            self._checkpointed = (snapshot, now)
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """Checkpoint the latest snapshot now (at exit); skipped if a rebuild holds the lock too long."""
+        if self._update_lock.acquire(timeout=timeout):
+            try:
+                self._checkpoint(force=True)
+            finally:
+                self._update_lock.release()
+
+    def _update_locked(self) -> None:
+        fingerprint = store.fingerprint()
+        current = self._snapshot
+        if current is not None and current.fingerprint == fingerprint:
+            return
+        if current is None and fingerprint != (0, 0) and self._warm_start(fingerprint):
+            return
+        version = current.version + 1 if current else 1
+        df = store.load()
+        if self._kpis is None:
+            self._kpis = KpiAccumulator.restore(df)
+            kpis_changed = True
+        else:
+            # Only readings newer than the running totals are integrated
+            kpis_changed = self._kpis.update(df) > 0
+        self._publish(build_snapshot(df, version, fingerprint, self._kpis))
+        if kpis_changed:
+            self._kpis.save()
+
+    def run(self) -> None:
+        while True:
+            try:
+                self._update()
+                self.last_error = None
+            except Exception as e:  # keep serving the last good snapshot
+                self.last_error = e
+                print(f"[aggregator] rebuild failed: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+@st.cache_resource
+def get_worker() -> AggregationWorker:
+    """The single per-server worker (cache_resource is shared across sessions)."""
+    worker = AggregationWorker()
+    worker.start()
+    atexit.register(worker.flush)
+    get_compactor()
+    return worker
+
+
+def get_snapshot(timeout: float = 60.0) -> Snapshot:
+    """Latest snapshot; blocks only on the very first build after server start."""
+    worker = get_worker()
+    snapshot = worker.wait_ready(timeout)
+    if snapshot is None:
+        raise RuntimeError(f"Telemetry not available yet: {worker.last_error or 'still loading'}")
+    return snapshot
@@ -0,0 +1,183 @@
+# modules/watcher.py
+"""
+Push-based change notification for the lab results folder and the telemetry store.
+
+Uses watchdog (inotify on Linux) when available and falls back to polling
+stat() signatures. Bursts of events (an Excel save, an ingest commit) are
+debounced; once a target has been quiet for `debounce` seconds (or has been
+changing for `max_wait` seconds, so sustained writes still get through) its
+callbacks run in the background and its version counter is bumped. Pages compare
+versions, which is a dict lookup, instead of rescanning or blindly reloading.
+"""
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # polling fallback
+    Observer = None
+    FileSystemEventHandler = object
+
+DEBOUNCE_S = 1.0
+# Upper bound on how long a continuously changing target waits before firing
+MAX_WAIT_S = 5.0
+POLL_INTERVAL_S = 5.0
+
+
+@dataclass
+class _Target:
+    name: str
+    path: str
+    callbacks: list[Callable[[], None]] = field(default_factory=list)
+    version: int = 0
+    due: float | None = None  # monotonic time at which callbacks should fire
+    first_pending: float | None = None  # first event since the last firing
+    signature: tuple = ()
+
+    @property
+    def is_dir(self) -> bool:
+        return os.path.isdir(self.path)
+
+    @property
+    def watch_dir(self) -> str:
+        return self.path if self.is_dir else (os.path.dirname(self.path) or ".")
+
+    def matches(self, event_path: str) -> bool:
+        event_path = os.path.abspath(event_path)
+        target = os.path.abspath(self.path)
+        if self.is_dir:
+            return os.path.dirname(event_path) == target
+        return event_path == target
+
+    def stat_signature(self) -> tuple:
+        try:
+            if not self.is_dir:
+                st_ = os.stat(self.path)
+                return ((st_.st_mtime_ns, st_.st_size),)
+            with os.scandir(self.path) as it:
+                return tuple(sorted((e.name, e.stat().st_mtime_ns, e.stat().st_size) for e in it if e.is_file()))
+        except FileNotFoundError:
+            return ()
+
+
+class ChangeWatcher:
+    def __init__(self, debounce: float = DEBOUNCE_S, poll_interval: float = POLL_INTERVAL_S,
+                 use_inotify: bool = True, max_wait: float = MAX_WAIT_S):
+        self.debounce = debounce
+        self.max_wait = max(max_wait, debounce)
+        self.poll_interval = poll_interval
+        self._targets: dict[str, _Target] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._observer = None
+        self._use_inotify = use_inotify and Observer is not None
+        self.mode = "stopped"
+
+    def add(self, name: str, path: str, *callbacks: Callable[[], None]) -> None:
+        """Watch `path` (a directory's direct children, or a single file)."""
+        target = _Target(name, path, list(callbacks))
+        target.signature = target.stat_signature()
+        self._targets[name] = target
+
+    def version(self, name: str) -> int:
+        return self._targets[name].version
+
+    def versions(self, *names: str) -> tuple[int, ...]:
+        return tuple(self._targets[n].version for n in names)
+
+    def _schedule(self, targets: list[_Target]) -> None:
+        if not targets:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for target in targets:
+                if target.first_pending is None:
+                    target.first_pending = now
+                # Each new event pushes the deadline back, but never past max_wait
+                target.due = min(now + self.debounce, target.first_pending + self.max_wait)
+        self._wake.set()
+
+    def notify(self, event_path: str) -> None:
+        """Schedule callbacks for whichever target `event_path` belongs to."""
+        self._schedule([t for t in self._targets.values() if t.matches(event_path)])
+
+    # ---------- Event sources ----------
+    def _start_inotify(self) -> bool:
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type in ("opened", "closed_no_write"):
+                    return
+                watcher.notify(event.src_path)
+                if getattr(event, "dest_path", ""):
+                    watcher.notify(event.dest_path)
+
+        try:
+            observer = Observer()
+            for d in {t.watch_dir for t in self._targets.values()}:
+                os.makedirs(d, exist_ok=True)
+                observer.schedule(_Handler(), d, recursive=False)
+            observer.daemon = True
+            observer.start()
+        except Exception as e:  # e.g. inotify watch limit reached
+            print(f"[watcher] inotify unavailable ({e}); falling back to polling")
+            return False
+        self._observer = observer
+        return True
+
+    def _poll_once(self) -> None:
+        changed = []
+        for target in self._targets.values():
+            signature = target.stat_signature()
+            if signature != target.signature:
+                target.signature = signature
+                changed.append(target)
+        self._schedule(changed)
+
+    # ---------- Dispatch ----------
+    def _fire_due(self) -> float | None:
+        """Run callbacks for targets past their deadline; return seconds until the next one."""
+        now = time.monotonic()
+        with self._lock:
+            ready = [t for t in self._targets.values() if t.due is not None and t.due <= now]
+            for t in ready:
+                t.due = None
+                t.first_pending = None
+            pending = [t.due for t in self._targets.values() if t.due is not None]
+        for target in ready:
+            for callback in target.callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"[watcher] {target.name} callback failed: {e}")
+            if self._observer is None:
+                target.signature = target.stat_signature()
+            target.version += 1
+        return max(0.0, min(pending) - now) if pending else None
+
+    def _run(self) -> None:
+        next_poll = time.monotonic()
+        while True:
+            wait = self._fire_due()
+            if self._observer is None:
+                now = time.monotonic()
+                if now >= next_poll:
+                    self._poll_once()
+                    next_poll = now + self.poll_interval
+                    continue
+                wait = min(wait if wait is not None else self.poll_interval, next_poll - now)
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def start(self) -> "ChangeWatcher":
+        if self._use_inotify and self._start_inotify():
+            self.mode = "inotify"
+        else:
+            self.mode = "polling"
+        threading.Thread(target=self._run, name="change-watcher", daemon=True).start()
+        return self
@@ -1,63 +1,57 @@
 # pages/07_lab_results_list.py
 import os
-from datetime import datetime
 import pandas as pd
 import streamlit as st
 
+from modules.lab_results.index import scan
+from modules.lab_results.search import get_index
+from modules.lab_results.workbooks import LAB_DIR
+from utils.live_refresh import rerun_on_change
+from utils.session_cache import account_session_state
+
 st.set_page_config(page_title="Lab Results (List)", layout="wide")
+account_session_state()
 st.title("Lab Results (List)")
 st.caption("Browse all uploaded lab result workbooks. Click a row to open details.")
 
-LAB_DIR = "data/lab_results"
-
-def extract_sample_id_quick(xlsx_path: str) -> str | None:
-    """
-    Light-weight sampler: tries to read first sheet and find a 'Sample ID'
-    in long/tidy sheets with columns like ['Field','Value'] (case/spacing tolerant).
-    Returns None if not found or file unreadable.
-    """
-    try:
-        xls = pd.ExcelFile(xlsx_path)
-        # Try first sheet only for speed
-        df = xls.parse(xls.sheet_names[0], nrows=500)
-        cols_lower = {c.lower(): c for c in df.columns}
-        field_col = next((cols_lower[c] for c in cols_lower if c in {"field", "parameter", "name"}), None)
-        value_col = next((cols_lower[c] for c in cols_lower if c in {"value", "result", "data"}), None)
-        if field_col and value_col:
-            fields = df[field_col].astype(str).str.strip().str.lower().str.replace(r"[_\s]+", " ", regex=True)
-            mask = fields.isin(["sample id", "sampleid", "sample id:"])
-            if mask.any():
-                return df.loc[mask, value_col].astype(str).iloc[0].strip() or None
-    except Exception:
-        return None
-    return None
-
 # Ensure directory exists (don’t crash if missing)
 if not os.path.isdir(LAB_DIR):
     st.info(f"Folder not found: `{LAB_DIR}`. Create it and add .xlsx files.")
     st.stop()
 
-# Gather files
-files = sorted(
-    [f for f in os.listdir(LAB_DIR) if f.lower().endswith(".xlsx")],
-    key=lambda x: x.lower()
-)
+# New/changed workbooks trigger a rerun (index is already refreshed by then)
+rerun_on_change("lab_results")
+
+# Gather files (index is incremental + checkpointed; only changed files are opened)
+rows = scan(LAB_DIR)
 
-if not files:
+if not rows:
     st.warning(f"No Excel files found in `{LAB_DIR}`.")
     st.stop()
 
-# Build table data
-rows = []
-for fname in files:
-    path = os.path.join(LAB_DIR, fname)
-    mtime = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M")
-    sample_id = extract_sample_id_quick(path) or "—"
-    rows.append({"Filename": fname, "Sample ID": sample_id, "Modified": mtime})
-
 df = pd.DataFrame(rows)
 
+# ---------- Search ----------
+st.markdown("### Search")
+s1, s2, s3 = st.columns([4, 1, 1])
+query = s1.text_input("Text (sample, analyte, lab, ...)", placeholder="e.g. carbon, TP_BIOCHAR, mg/kg zinc")
+low = s2.number_input("Min value", value=None, format="%g")
+high = s3.number_input("Max value", value=None, format="%g")
+
+if query.strip() or low is not None or high is not None:
+    hits = get_index(LAB_DIR).search(query, low, high)
+    if hits.empty:
+        st.info("No matching cells.")
+    else:
+        st.caption(f"{len(hits)} matching cell(s) in {hits['File'].nunique()} workbook(s)")
+        st.dataframe(hits.drop(columns="path"), use_container_width=True, hide_index=True)
+        for path in hits["path"].unique():
+            if st.button(f"Open {os.path.basename(path)}", key=f"search_open_{path}"):
+                st.session_state["lab_file"] = path
+                st.switch_page("pages/08_lab_results_detail.py")
+
 # Show list
+st.markdown("### All workbooks")
 st.dataframe(df, use_container_width=True, hide_index=True)
 
 st.markdown("### Open a result")
@@ -72,4 +66,4 @@ for r in rows:
         st.switch_page("pages/08_lab_results_detail.py")
 
 st.markdown("---")
-st.caption("Tip: drop new Excel files into `data/lab_results/` and refresh.")
\ No newline at end of file
+st.caption("Tip: drop new Excel files into `data/lab_results/`; they appear here automatically.")
\ No newline at end of file
@@ -0,0 +1,65 @@
+# pages/09_lab_analyte_trends.py
+import altair as alt
+import streamlit as st
+
+from modules.lab_results.analytes import query, update
+from modules.lab_results.workbooks import LAB_DIR
+from utils.live_refresh import rerun_on_change
+from utils.session_cache import account_session_state
+
+st.set_page_config(page_title="Lab Analyte Trends", layout="wide")
+account_session_state()
+st.title("Lab Analyte Trends")
+st.caption("Compare analytes across all lab result workbooks.")
+
+rerun_on_change("lab_results")
+
+# Incremental: only new/changed workbooks are re-read
+table = update(LAB_DIR)
+
+if table.empty:
+    st.warning(f"No analytes found in `{LAB_DIR}`.")
+    st.stop()
+
+numeric = table[table["value"].notna()]
+analyte_options = sorted(numeric["analyte"].dropna().unique())
+default = [a for a in ("Carbon (C)", "Ash") if a in analyte_options]
+
+c1, c2 = st.columns([3, 2])
+analytes = c1.multiselect("Analytes", analyte_options, default=default or analyte_options[:1])
+test_options = sorted(numeric.loc[numeric["analyte"].isin(analytes), "test"].dropna().unique())
+tests = c2.multiselect("Basis / test (optional)", test_options)
+
+selected = query(table, analytes=analytes, tests=tests, numeric_only=True).copy()
+
+if selected.empty:
+    st.info("Select at least one analyte with numeric values.")
+    st.stop()
+
+selected["series"] = selected["analyte"] + " — " + selected["test"].fillna("")
+selected["label"] = selected["sample_id"].fillna("?") + " (" + selected["source_file"] + ")"
+x = (
+    alt.X("reported:T", title="Date reported")
+    if selected["reported"].notna().all()
+    else alt.X("label:N", title="Sample", sort=None)
+)
+
+chart = (
+    alt.Chart(selected)
+    .mark_line(point=True)
+    .encode(
+        x=x,
+        y=alt.Y("value:Q", title="Value"),
+        color=alt.Color("series:N", title="Analyte"),
+        tooltip=["sample_id", "source_file", "analyte", "test", "value", "unit", "reported:T"],
+    )
+    .properties(height=380)
+)
+st.altair_chart(chart, use_container_width=True)
+
+st.subheader("Values")
+st.dataframe(
+    selected[["sample_id", "reported", "analyte", "test", "value", "unit", "source_file"]],
+    use_container_width=True,
+    hide_index=True,
+)
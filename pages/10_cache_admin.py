@@ -0,0 +1,55 @@
+# pages/10_cache_admin.py
+import pandas as pd
+import streamlit as st
+
+from modules.cache import REGISTRY, process_rss_bytes
+from utils.session_cache import account_session_state
+
+st.set_page_config(page_title="Cache & Memory", layout="wide")
+account_session_state()
+st.title("Cache & Memory")
+st.caption("In-process caches registered with the cache registry, against the global memory budget.")
+
+REGISTRY.purge_expired()
+stats = pd.DataFrame(REGISTRY.stats())
+total = REGISTRY.total_bytes
+budget = REGISTRY.budget_bytes
+
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Cached", f"{total / 2**20:,.1f} MB")
+c2.metric("Budget", f"{budget / 2**20:,.0f} MB")
+c3.metric("Process RSS", f"{process_rss_bytes() / 2**20:,.0f} MB")
+c4.metric("Evictions", f"{int(stats['evictions'].sum()) if not stats.empty else 0:,}")
+st.progress(min(total / budget, 1.0) if budget else 0.0)
+if total > budget:
+    st.warning("Resident (non-evictable) data alone exceeds the budget; raise NELLIE_CACHE_BUDGET_MB.")
+
+if stats.empty:
+    st.info("No caches registered yet.")
+    st.stop()
+
+view = stats.assign(
+    size_mb=stats["bytes"] / 2**20,
+    hit_rate=stats["hit_rate"] * 100,
+)[["cache", "entries", "size_mb", "hit_rate", "hits", "misses", "evictions", "expirations", "ttl_s", "evictable"]]
+st.dataframe(
+    view,
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "cache": "Cache",
+        "entries": "Entries",
+        "size_mb": st.column_config.NumberColumn("Size (MB)", format="%.2f"),
+        "hit_rate": st.column_config.NumberColumn("Hit rate", format="%.0f%%"),
+        "hits": "Hits",
+        "misses": "Misses",
+        "evictions": "Evictions",
+        "expirations": "Expired",
+        "ttl_s": st.column_config.NumberColumn("TTL (s)", format="%d"),
+        "evictable": "Evictable",
+    },
+)
+
+if st.button("Clear evictable caches"):
+    REGISTRY.clear_evictable()
+    st.rerun()
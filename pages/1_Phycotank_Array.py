@@ -4,39 +4,38 @@ from utils.sidebar import show_sidebar
 show_sidebar()
 
 import streamlit as st
-import pandas as pd
 import altair as alt
 
-st.title("Phycotank Array — Monitoring")
+from modules.telemetry import retention, store
+from modules.telemetry.worker import get_snapshot
+from utils.data_quality import show_data_quality
+from utils.export_panel import show_export_panel
+from utils.live_refresh import rerun_on_change
+from utils.report_panel import show_reports_panel
 
-# --- Data loader ---
-@st.cache_data
-def load_data():
-    # CSV must be in the repo root (adjust path if you moved it)
-    return pd.read_csv("phycotank_array_dummy_data_filled.csv", parse_dates=["timestamp"])
+st.title("Phycotank Array — Monitoring")
 
-df = load_data()
+# --- Data (precomputed by the shared aggregation worker) ---
+# Record versions before reading the snapshot, so a rebuild in between still triggers a rerun
+rerun_on_change("telemetry")
+snapshot = get_snapshot()
 
 # --- Controls (sidebar) ---
 st.sidebar.subheader("Phycotank Controls")
-tank_options = ["Aggregate"] + sorted(df["phycotank_id"].unique())
+tank_options = ["Aggregate"] + snapshot.tanks
 selected_option = st.sidebar.selectbox("Select a phycotank", tank_options)
 show_raw = st.sidebar.checkbox("Show raw data")
 
+# --- Data quality (common-grid coverage, gaps, stale sensors) ---
+show_data_quality(snapshot.quality)
+
 # --- Metrics to plot ---
-metrics = [
-    "pH",
-    "temperature_C",
-    "flow_rate_lph",
-    "energy_consumption_kWh",
-    "lux",
-    "mag_field_T",
-]
+metrics = store.METRICS
 
 # --- Charts ---
 if selected_option == "Aggregate":
     st.header("Aggregated Metrics (All Instrumented Tanks)")
-    agg_df = df.groupby("timestamp", as_index=False)[metrics].mean()
+    agg_df = snapshot.aggregate
 
     for metric in metrics:
         chart = (
@@ -60,7 +59,7 @@ if selected_option == "Aggregate":
 
 else:
     st.header(f"Metrics for {selected_option}")
-    filtered = df[df["phycotank_id"] == selected_option].copy()
+    filtered = snapshot.by_tank[selected_option]
 
     for metric in metrics:
         chart = (
@@ -80,4 +79,33 @@ else:
 
     if show_raw:
         st.subheader(f"Raw Data — {selected_option}")
-        st.dataframe(filtered, use_container_width=True)
\ No newline at end of file
+        st.dataframe(filtered, use_container_width=True)
+
+    # Compacted days are cached per compaction; only the snapshot's raw tail is rolled up per rerun
+    with st.expander("Long-term history (daily rollups)"):
+        history_metric = st.selectbox("Metric", metrics, key="history_metric")
+        history = retention.history(selected_option, recent=filtered)
+        if history.empty:
+            st.info("No history yet.")
+        else:
+            label = history_metric.replace("_", " ").title()
+            base = alt.Chart(history).encode(x="timestamp:T")
+            band = base.mark_area(opacity=0.25).encode(
+                y=alt.Y(f"{history_metric}_min", title=label), y2=f"{history_metric}_max"
+            )
+            line = base.mark_line().encode(
+                y=f"{history_metric}_mean",
+                tooltip=["timestamp:T", f"{history_metric}_mean", f"{history_metric}_min",
+                         f"{history_metric}_max", f"{history_metric}_count"],
+            )
+            st.altair_chart((band + line).properties(title=f"Daily {label} (mean, min–max)", height=300),
+                            use_container_width=True)
+
+# --- Export ---
+show_export_panel(
+    tank_options[1:],
+    snapshot.min_ts,
+    snapshot.max_ts,
+    default_tanks=None if selected_option == "Aggregate" else [selected_option],
+)
+show_reports_panel()
@@ -3,8 +3,10 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 
+from modules.cache import cached
+
 # Load the data
-@st.cache_data
+@cached("legacy-telemetry-csv", copy_result=True)
 def load_data():
     return pd.read_csv("phycotank_array_dummy_data_filled.csv", parse_dates=["timestamp"])
 
@@ -4,8 +4,10 @@ import pandas as pd
 import altair as alt
 from datetime import datetime
 
+from modules.cache import cached
+
 # Load the data
-@st.cache_data
+@cached("legacy-telemetry-csv", copy_result=True)
 def load_data():
     return pd.read_csv("phycotank_array_dummy_data_filled.csv", parse_dates=["timestamp"])
 
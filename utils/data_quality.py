@@ -0,0 +1,36 @@
+# utils/data_quality.py
+import streamlit as st
+
+import pandas as pd
+
+from modules.telemetry.resample import GridSummary
+
+
+def _fmt_freq(freq: pd.Timedelta) -> str:
+    seconds = int(freq.total_seconds())
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600} h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60} min"
+    return f"{seconds} s"
+
+
+def show_data_quality(quality: GridSummary):
+    """Grid coverage, gaps and stale sensors from the worker's resampling stage."""
+    label = f"Data quality — {quality.coverage_pct:.1f}% coverage on a {_fmt_freq(quality.freq)} grid"
+    if not quality.stale.empty:
+        st.warning(f"{quality.stale['phycotank_id'].nunique()} tank(s) with stale sensors")
+    with st.expander(label):
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Grid slots", f"{len(quality.times):,}")
+        c2.metric("Gaps", f"{len(quality.gaps):,}")
+        c3.metric("Stale sensors", f"{len(quality.stale):,}")
+
+        st.markdown("**Coverage by tank** (% of grid slots with a reading)")
+        st.dataframe(quality.coverage.round(1), hide_index=True, use_container_width=True)
+        if not quality.gaps.empty:
+            st.markdown("**Gaps** (longest first)")
+            st.dataframe(quality.gaps, hide_index=True, use_container_width=True)
+        if not quality.stale.empty:
+            st.markdown("**Stale sensors** (no reading in the most recent slots)")
+            st.dataframe(quality.stale, hide_index=True, use_container_width=True)
@@ -0,0 +1,13 @@
+# utils/downloads.py
+
+
+def read_file(path: str) -> bytes:
+    """
+    Deferred download source for st.download_button(data=partial(read_file, path)).
+
+    The file is read in full, but only when the button is clicked, so reruns
+    never hold it in memory. Streamlit serves the returned bytes whole; this
+    does not stream.
+    """
+    with open(path, "rb") as f:
+        return f.read()
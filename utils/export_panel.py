@@ -0,0 +1,105 @@
+# utils/export_panel.py
+import hashlib
+import os
+import tempfile
+import time as clock
+from datetime import datetime, time
+from functools import partial
+
+import streamlit as st
+
+from modules.telemetry import retention, store
+from modules.telemetry.export import FORMATS, MIME_TYPES, export_telemetry
+from utils.downloads import read_file
+
+EXPORT_DIR = "exports"
+# Prepared exports older than this are deleted the next time anyone prepares one
+EXPORT_MAX_AGE_S = 3600
+
+
+def _export_path(tanks: list[str], start_date, end_date, resolution: str, fmt: str) -> str:
+    """Same selection over unchanged data -> same file, so it can be reused."""
+    key = (sorted(tanks), resolution, store.fingerprint(), retention.rollups_fingerprint())
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=6).hexdigest()
+    return os.path.join(EXPORT_DIR, f"phycotank_{start_date:%Y%m%d}_{end_date:%Y%m%d}_{resolution}_{digest}.{fmt}")
+
+
+def _prune_exports(keep: str) -> None:
+    cutoff = clock.time() - EXPORT_MAX_AGE_S
+    with os.scandir(EXPORT_DIR) as it:
+        for entry in it:
+            if entry.is_file() and entry.path != keep and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:  # another session pruned it first
+                    pass
+
+
+def _prepare(dest: str, fmt: str, tanks: list[str], start_date, end_date, resolution: str) -> None:
+    # Written under a temporary name, so a failed or interrupted export is never reused
+    fd, tmp = tempfile.mkstemp(dir=EXPORT_DIR, suffix=".part")
+    os.close(fd)
+    progress = st.empty()
+    try:
+        stats = export_telemetry(
+            tmp,
+            fmt=fmt,
+            tanks=tanks,
+            start=datetime.combine(start_date, time.min),
+            end=datetime.combine(end_date, time.max),
+            resolution=resolution,
+            on_chunk=lambda s: progress.caption(f"Exported {s.rows:,} rows…"),
+        )
+    except Exception as e:
+        progress.empty()
+        os.remove(tmp)
+        st.error(f"Export failed: {e}")
+    else:
+        progress.empty()
+        os.replace(tmp, dest)
+        st.session_state["export_file"] = (dest, fmt, stats.summary())
+
+
+def show_export_panel(tank_ids: list[str], min_ts, max_ts, default_tanks: list[str] | None = None):
+    """Export the selected tanks/time window to CSV or Parquet, streamed from all retention tiers."""
+    with st.expander("Export data"):
+        # The snapshot only covers raw data; compacted history goes back further
+        oldest = retention.earliest()
+        first_ts = min(min_ts, oldest) if oldest is not None else min_ts
+        tanks = st.multiselect("Tanks", tank_ids, default=default_tanks or tank_ids, key="export_tanks")
+        c1, c2, c3, c4 = st.columns(4)
+        start_date = c1.date_input("From", value=min_ts.date(), min_value=first_ts.date(),
+                                   max_value=max_ts.date(), key="export_start")
+        end_date = c2.date_input("To", value=max_ts.date(), min_value=first_ts.date(),
+                                 max_value=max_ts.date(), key="export_end")
+        resolution = c3.selectbox("Resolution", retention.RESOLUTIONS, key="export_resolution")
+        fmt = c4.selectbox("Format", FORMATS, key="export_format")
+        if resolution == "raw" and start_date < min_ts.date():
+            st.caption(f"Readings before {min_ts:%d %b %Y} have been compacted; "
+                       "they are exported as hourly/daily means.")
+
+        if st.button("Prepare export", disabled=not tanks, key="export_run"):
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+            dest = _export_path(tanks, start_date, end_date, resolution, fmt)
+            _prune_exports(keep=dest)
+
+            if os.path.exists(dest):
+                os.utime(dest)  # reused: restart its age
+                size = os.path.getsize(dest)
+                summary = f"Data unchanged; reusing the prepared file ({size / 1e6:,.2f} MB)"
+                st.session_state["export_file"] = (dest, fmt, summary)
+            else:
+                _prepare(dest, fmt, tanks, start_date, end_date, resolution)
+
+        export_file = st.session_state.get("export_file")
+        if export_file and os.path.exists(export_file[0]):
+            dest, fmt, summary = export_file
+            st.caption(summary)
+            # Read on click, so reruns don't load the export into memory
+            st.download_button(
+                label=f"Download {fmt.upper()}",
+                data=partial(read_file, dest),
+                file_name=os.path.basename(dest),
+                mime=MIME_TYPES[fmt],
+                key="export_download",
+            )
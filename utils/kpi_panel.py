@@ -0,0 +1,56 @@
+# utils/kpi_panel.py
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+from modules.telemetry.kpi import KPIS, KpiSummary
+
+_LABELS = {
+    "energy_kWh": "Energy",
+    "light_dose_lux_h": "Light dose",
+    "throughput_L": "Throughput",
+}
+
+
+def _fmt(value: float, unit: str) -> str:
+    if unit == "lux·h" and abs(value) >= 1e6:
+        return f"{value / 1e6:,.2f} Mlux·h"
+    if unit == "L" and abs(value) >= 1e4:
+        return f"{value / 1e3:,.1f} m³"
+    return f"{value:,.1f} {unit}"
+
+
+def show_kpis(kpis: KpiSummary, tank: str | None = None):
+    """Cumulative energy, light dose and throughput (array-wide, or one tank) with rolling rates."""
+    window_h = int(kpis.window / pd.Timedelta(hours=1))
+    st.subheader("Operating KPIs" + (f" — {tank}" if tank else ""))
+    cols = st.columns(len(KPIS))
+    for col, (name, (cum, rate)) in zip(cols, kpis.headline(tank).items()):
+        unit = KPIS[name][2]
+        col.metric(f"Cumulative {_LABELS[name].lower()}", _fmt(cum, unit),
+                   delta=f"{_fmt(rate, unit)}/day (last {window_h} h)", delta_color="off")
+
+    if tank is None:
+        series = kpis.array
+    elif tank in kpis.tanks:
+        series = kpis.tanks[tank].frame(kpis.window)
+    else:
+        st.caption("No readings integrated for this tank yet.")
+        return
+
+    with st.expander("KPI trends"):
+        view = st.radio("Show", ["Cumulative", f"Rolling {window_h} h rate"], horizontal=True, key="kpi_view")
+        suffix = "" if view == "Cumulative" else "_rate"
+        for name, (_, _, unit) in KPIS.items():
+            label = f"{_LABELS[name]} ({unit}{'' if not suffix else '/day'})"
+            chart = alt.Chart(series).mark_line().encode(
+                x="timestamp:T",
+                y=alt.Y(f"{name}{suffix}:Q", title=label),
+                tooltip=["timestamp:T", alt.Tooltip(f"{name}{suffix}:Q", format=",.2f")],
+            ).properties(height=220)
+            st.altair_chart(chart, use_container_width=True)
+
+        if tank is None:
+            st.markdown("**By tank**")
+            numeric = kpis.totals.select_dtypes("number").columns
+            st.dataframe(kpis.totals.round(dict.fromkeys(numeric, 2)), hide_index=True, use_container_width=True)
@@ -0,0 +1,43 @@
+# utils/live_refresh.py
+import streamlit as st
+
+from modules.lab_results import analytes, index, search
+from modules.lab_results.workbooks import LAB_DIR
+from modules.telemetry import store
+from modules.telemetry.worker import get_worker
+from modules.watcher import ChangeWatcher
+
+# How often an open page checks the (in-memory) change versions
+CHECK_INTERVAL_S = 2.0
+
+
+@st.cache_resource
+def get_watcher() -> ChangeWatcher:
+    """
+    One watcher per server. On change it refreshes the affected caches in the
+    background, so the rerun it triggers only reads ready results.
+    """
+    watcher = ChangeWatcher()
+    watcher.add(
+        "lab_results",
+        LAB_DIR,
+        lambda: index.scan(LAB_DIR),
+        lambda: analytes.update(LAB_DIR),
+        lambda: search.get_index(LAB_DIR),
+    )
+    watcher.add("telemetry", store.TELEMETRY_CSV, get_worker().update_now)
+    return watcher.start()
+
+
+def rerun_on_change(*targets: str, check_every: float = CHECK_INTERVAL_S):
+    """Rerun the page when any of the watched `targets` has a new version."""
+    watcher = get_watcher()
+    key = "_watch_versions_" + "_".join(targets)
+    st.session_state[key] = watcher.versions(*targets)
+
+    @st.fragment(run_every=check_every)
+    def _check():
+        if watcher.versions(*targets) != st.session_state.get(key):
+            st.rerun(scope="app")
+
+    _check()
@@ -0,0 +1,148 @@
+# utils/page_registry.py
+"""
+Sidebar menu model, resolved once per server.
+
+MENU lists the pages we intend to link, by section. On first use, the page
+files that actually exist next to the main script are discovered the same way
+Streamlit discovers them (main script + pages/*.py). Each MENU entry is then
+matched to a real file, case-insensitively, so a wrong-case name still
+resolves. Entries whose file does not exist yet are dropped, and logged once.
+Pages found on disk but not in MENU (and not HIDDEN) are appended to the last
+section, so a new page file shows up without touching this module.
+
+The result is an immutable Menu, cached with st.cache_resource. The sidebar
+only emits it.
+"""
+import os
+import re
+from dataclasses import dataclass
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# (section, ((path relative to the main script, label), ...)); paths may not exist yet
+MENU: tuple[tuple[str, tuple[tuple[str, str], ...]], ...] = (
+    ("Operations", (
+        ("Millie_Dashboard.py", "Home"),
+        ("pages/01_system_overview.py", "System Overview"),
+        ("pages/1_Phycotank_Array.py", "Array Monitoring"),
+        ("pages/02_array_operations.py", "Array Operations"),
+        ("pages/03_dehydration_operations.py", "Dehydration Operations"),
+        ("pages/04_pyrolysis_operations.py", "Pyrolysis Operations"),
+    )),
+    ("Production", (
+        ("pages/05_production.py", "Production"),
+        ("pages/06_batch_detail_list.py", "Batch Detail (List)"),
+        ("pages/07_lab_results_list.py", "Lab Results (List)"),
+        ("pages/09_lab_analyte_trends.py", "Lab Analyte Trends"),
+    )),
+    ("Site", (
+        ("pages/08_site_data.py", "Site Data"),
+        ("pages/09_insurances.py", "Insurances"),
+        ("pages/10_permits.py", "Permits"),
+        ("pages/11_tea.py", "TEA"),
+        ("pages/12_lca.py", "LCA (placeholder)"),
+    )),
+    ("Admin", (
+        ("pages/10_cache_admin.py", "Cache & Memory"),
+    )),
+)
+
+# Reached from other pages only (e.g. a row click), never linked from the menu
+HIDDEN = {"pages/08_lab_results_detail.py"}
+
+# Streamlit's page-name rule for pages/ files: drop the numeric ordering prefix
+_PAGE_NAME = re.compile(r"^[_ ]*\d*[_ ]*(.*)$")
+
+
+@dataclass(frozen=True)
+class PageEntry:
+    path: str       # relative to the main script directory, as st.page_link expects
+    label: str
+    url_path: str   # "" for the main page
+
+
+@dataclass(frozen=True)
+class Menu:
+    sections: tuple[tuple[str, tuple[PageEntry, ...]], ...]
+    skipped: tuple[str, ...]  # MENU paths with no matching file
+
+    @property
+    def pages(self) -> tuple[PageEntry, ...]:
+        return tuple(p for _, entries in self.sections for p in entries)
+
+
+def _url_path(path: str, main_script: str) -> str:
+    if path == main_script:
+        return ""
+    return _PAGE_NAME.match(os.path.splitext(os.path.basename(path))[0]).group(1)
+
+
+def discover_pages(root: str, main_script: str) -> list[str]:
+    """The main script plus pages/*.py under `root`, in Streamlit's order (relative paths)."""
+    found = [main_script]
+    pages_dir = os.path.join(root, "pages")
+    if os.path.isdir(pages_dir):
+        names = [n for n in os.listdir(pages_dir)
+                 if n.endswith(".py") and not n.startswith((".", "_"))]
+        found += [f"pages/{n}" for n in sorted(names, key=_sort_key)]
+    return found
+
+
+def _sort_key(name: str) -> tuple[float, str]:
+    prefix = re.match(r"^\d+", name)
+    return (float(prefix.group()) if prefix else float("inf"), name.lower())
+
+
+def build_menu(root: str, main_script: str) -> Menu:
+    available = discover_pages(root, main_script)
+    by_lower = {p.lower(): p for p in available}
+    used, skipped, seen_urls = set(), [], set()
+    sections = []
+
+    def entry(path: str, label: str) -> PageEntry | None:
+        url = _url_path(path, main_script)
+        if url in seen_urls:  # Streamlit would serve only one of them
+            print(f"[pages] {path} has the same URL as another page; not linked")
+            return None
+        seen_urls.add(url)
+        used.add(path)
+        return PageEntry(path, label, url)
+
+    for title, items in MENU:
+        entries = []
+        for path, label in items:
+            actual = by_lower.get(path.lower())
+            if actual is None or actual in used:
+                skipped.append(path)
+                continue
+            if (e := entry(actual, label)) is not None:
+                entries.append(e)
+        sections.append([title, entries])
+
+    hidden = {h.lower() for h in HIDDEN}
+    extra = [p for p in available if p not in used and p.lower() not in hidden]
+    for path in extra:
+        label = _url_path(path, main_script).replace("_", " ").strip() or "Home"
+        if (e := entry(path, label)) is not None and sections:
+            sections[-1][1].append(e)
+
+    if skipped:
+        print(f"[pages] not linked (no such page): {', '.join(skipped)}")
+    return Menu(
+        sections=tuple((title, tuple(entries)) for title, entries in sections if entries),
+        skipped=tuple(skipped),
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _menu_for(main_script_path: str) -> Menu:
+    root = os.path.dirname(os.path.abspath(main_script_path))
+    return build_menu(root, os.path.basename(main_script_path))
+
+
+def get_menu() -> Menu:
+    """The menu for the running app; resolved on the first call, then shared by every session."""
+    ctx = get_script_run_ctx()
+    main_script = ctx.main_script_path if ctx else os.path.join(os.getcwd(), "Millie_Dashboard.py")
+    return _menu_for(os.path.abspath(main_script))
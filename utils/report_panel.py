@@ -0,0 +1,36 @@
+# utils/report_panel.py
+from functools import partial
+
+import streamlit as st
+
+from modules.telemetry.report import get_report_scheduler, list_reports
+from utils.downloads import read_file
+
+
+def show_reports_panel():
+    """Archived daily/weekly PDF reports; generated in the background, served on click."""
+    scheduler = get_report_scheduler()
+    with st.expander("Scheduled reports"):
+        reports = list_reports()
+        if scheduler.last_error:
+            st.warning(f"Last report run failed: {scheduler.last_error}")
+        if not reports:
+            st.caption("No reports yet — they are generated in the background once a day or week completes.")
+            return
+
+        daily, weekly = st.tabs(["Daily", "Weekly"])
+        for tab, kind in ((daily, "daily"), (weekly, "weekly")):
+            with tab:
+                rows = [r for r in reports if r["kind"] == kind]
+                if not rows:
+                    st.caption(f"No {kind} reports yet.")
+                for r in rows:
+                    c1, c2 = st.columns([3, 1])
+                    c1.write(f"{r['name']}  ·  {r['size'] / 1024:,.0f} KB")
+                    c2.download_button(
+                        "Download",
+                        data=partial(read_file, r["path"]),
+                        file_name=r["name"],
+                        mime="application/pdf",
+                        key=f"report_{r['name']}",
+                    )
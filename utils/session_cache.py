@@ -0,0 +1,20 @@
+# utils/session_cache.py
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from modules import cache
+
+# Sessions not seen for this long drop out of the accounting
+SESSION_TTL_S = 30 * 60
+
+# Sizes only: holding the state itself here would keep closed sessions alive
+_sessions = cache.register("session-state", ttl=SESSION_TTL_S, evictable=False)
+
+
+def account_session_state() -> None:
+    """Record this session's st.session_state size in the cache registry (call once per rerun)."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    state = {key: st.session_state[key] for key in st.session_state}
+    _sessions.set(ctx.session_id, None, size=cache.estimate_size(state))
@@ -2,11 +2,45 @@
 import os
 import base64
 from datetime import datetime
+from functools import lru_cache
+from html import escape
 from zoneinfo import ZoneInfo
 import streamlit as st
 
+from utils.page_registry import Menu, get_menu
+from utils.session_cache import account_session_state
+
+LOGO_PATH = "assets/nellie_carbon_capture_chip_logo_white.png"
+
+# --- CSS: compact layout, hide default nav, pin footer, remove fullscreen on sidebar images ---
+_CSS = """
+    <style>
+    /* Sidebar as flex column so footer stays at bottom; reduce top padding */
+    section[data-testid="stSidebar"] > div,
+    section[data-testid="stSidebar"] div[data-testid="stSidebarContent"] {
+        height: 100%;
+        display: flex;
+        flex-direction: column;
+        padding-top: 0.5rem;
+    }
+    /* Hide Streamlit's built-in multipage nav (we use our own menu) */
+    div[data-testid="stSidebarNav"] { display: none !important; }
+    /* Typography + spacing (compact) */
+    .sidebar-title { font-weight: 600; font-size: 1rem; margin: .25rem 0 .25rem 0; }
+    .sidebar-timestamp { font-size: .9rem; margin: 0 0 .5rem 0; }
+    .sidebar-section { font-weight: 600; font-size: .9rem; margin: .5rem 0 .25rem 0; }
+    .sidebar-menu a { display:block; padding: .2rem 0; text-decoration:none; }
+    .sidebar-sep { margin: .5rem 0; border: 0; border-top: 1px solid #e6e6e6; }
+    /* Footer styling + placement */
+    .sidebar-footer { margin-top: auto; font-size: 0.85rem; opacity: 0.8; }
+    /* Hide fullscreen hover button for any images in the sidebar */
+    section[data-testid="stSidebar"] button[title="View fullscreen"] { display: none !important; }
+    </style>
+"""
+
+@lru_cache(maxsize=1)
 def _embed_logo_base64(path: str) -> str:
-    """Return an <img> tag with the file embedded as base64; no fullscreen button."""
+    """Return an <img> tag with the file embedded as base64; no fullscreen button. Encoded once."""
     with open(path, "rb") as f:
         b64 = base64.b64encode(f.read()).decode("utf-8")
     # Compact top/bottom spacing
@@ -16,38 +50,23 @@ def _embed_logo_base64(path: str) -> str:
         + "' style='width:100%;display:block;margin:0 0 .25rem 0;' alt='Nellie logo'/>"
     )
 
+@lru_cache(maxsize=4)
+def _menu_html(menu: Menu) -> str:
+    """Plain-link version of the menu, for runtimes where st.page_link can't resolve pages."""
+    groups = [
+        "".join(f"<a href='./{escape(p.url_path)}'>{escape(p.label)}</a>" for p in entries)
+        for _, entries in menu.sections
+    ]
+    return "<div class='sidebar-menu'>" + "<br/>".join(groups) + "</div>"
+
 def show_sidebar():
-    # --- CSS: compact layout, hide default nav, pin footer, remove fullscreen on sidebar images ---
-    st.markdown("""
-        <style>
-        /* Sidebar as flex column so footer stays at bottom; reduce top padding */
-        section[data-testid="stSidebar"] > div,
-        section[data-testid="stSidebar"] div[data-testid="stSidebarContent"] {
-            height: 100%;
-            display: flex;
-            flex-direction: column;
-            padding-top: 0.5rem;
-        }
-        /* Hide Streamlit's built-in multipage nav (we use our own menu) */
-        div[data-testid="stSidebarNav"] { display: none !important; }
-        /* Typography + spacing (compact) */
-        .sidebar-title { font-weight: 600; font-size: 1rem; margin: .25rem 0 .25rem 0; }
-        .sidebar-timestamp { font-size: .9rem; margin: 0 0 .5rem 0; }
-        .sidebar-section { font-weight: 600; font-size: .9rem; margin: .5rem 0 .25rem 0; }
-        .sidebar-menu a { display:block; padding: .2rem 0; text-decoration:none; }
-        .sidebar-sep { margin: .5rem 0; border: 0; border-top: 1px solid #e6e6e6; }
-        /* Footer styling + placement */
-        .sidebar-footer { margin-top: auto; font-size: 0.85rem; opacity: 0.8; }
-        /* Hide fullscreen hover button for any images in the sidebar */
-        section[data-testid="stSidebar"] button[title="View fullscreen"] { display: none !important; }
-        </style>
-    """, unsafe_allow_html=True)
+    account_session_state()
+    st.markdown(_CSS, unsafe_allow_html=True)
 
     with st.sidebar:
         # --- Logo (base64 embed = no fullscreen control) ---
-        logo_path = "assets/nellie_carbon_capture_chip_logo_white.png"
-        if os.path.exists(logo_path):
-            st.markdown(_embed_logo_base64(logo_path), unsafe_allow_html=True)
+        if os.path.exists(LOGO_PATH):
+            st.markdown(_embed_logo_base64(LOGO_PATH), unsafe_allow_html=True)
         else:
             st.markdown("**Nellie Technologies Ltd**")
 
@@ -59,53 +78,21 @@ def show_sidebar():
         st.markdown("<hr class='sidebar-sep'/>", unsafe_allow_html=True)
         st.markdown("<div class='sidebar-section'>Menu</div>", unsafe_allow_html=True)
 
-        # --- Custom menu (lowercase files) ---
+        # --- Menu: resolved once per server (utils/page_registry.py); only existing pages are linked ---
+        menu = get_menu()
         try:
-            # Top-level / operations
-            st.page_link("Nellie.py", label="Home")
-            st.page_link("pages/01_system_overview.py", label="System Overview")
-            st.page_link("pages/02_array_operations.py", label="Array Operations")
-            st.page_link("pages/03_dehydration_operations.py", label="Dehydration Operations")
-            st.page_link("pages/04_pyrolysis_operations.py", label="Pyrolysis Operations")
-
-            st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
-            st.page_link("pages/05_production.py", label="Production")
-            st.page_link("pages/06_batch_detail_list.py", label="Batch Detail (List)")
-            st.page_link("pages/07_Lab_Results_List.py", label="Lab Results (List)")
-# no link to detail page here
-
-            st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
-            st.page_link("pages/08_site_data.py", label="Site Data")
-            st.page_link("pages/09_insurances.py", label="Insurances")
-            st.page_link("pages/10_permits.py", label="Permits")
-            st.page_link("pages/11_tea.py", label="TEA")
-            st.page_link("pages/12_lca.py", label="LCA (placeholder)")
+            for i, (_, entries) in enumerate(menu.sections):
+                if i:
+                    st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
+                for page in entries:
+                    st.page_link(page.path, label=page.label)
         except Exception:
             # Fallback simple HTML links if st.page_link isn't available
-            st.markdown(
-                "<div class='sidebar-menu'>"
-                "<a href='./'>Home</a>"
-                "<a href='./system_overview'>System Overview</a>"
-                "<a href='./array_operations'>Array Operations</a>"
-                "<a href='./dehydration_operations'>Dehydration Operations</a>"
-                "<a href='./pyrolysis_operations'>Pyrolysis Operations</a>"
-                "<br/>"
-                "<a href='./production'>Production</a>"
-                "<a href='./batch_detail_list'>Batch Detail (List)</a>"
-                "<a href='./lab_results_list'>Lab Results (List)</a>"
-                "<br/>"
-                "<a href='./site_data'>Site Data</a>"
-                "<a href='./insurances'>Insurances</a>"
-                "<a href='./permits'>Permits</a>"
-                "<a href='./tea'>TEA</a>"
-                "<a href='./lca'>LCA (placeholder)</a>"
-                "</div>",
-                unsafe_allow_html=True
-            )
+            st.markdown(_menu_html(menu), unsafe_allow_html=True)
 
         # --- Footer pinned at bottom ---
         year = datetime.now(ZoneInfo("Europe/London")).year
         st.markdown(
             f"<div class='sidebar-footer'>© Nellie Technologies Ltd. {year}. All rights reserved.</div>",
             unsafe_allow_html=True
-        )
\ No newline at end of file
+        )